@@ -3,73 +3,169 @@
 import os
 import glob
 import datetime
-import xml.etree.ElementTree as ET
+import html
+import re
+import shutil
+import tempfile
 import argparse
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+# Markup that can't hold attributes is matched first so it's skipped whole;
+# only real start tags are searched for a timestamp attribute.
+TAG_RE = re.compile(
+    rb'<!--.*?-->|<!\[CDATA\[.*?\]\]>|<\?.*?\?>|<![^>]*>'
+    rb'|<[A-Za-z_:][^\s/>]*(?:\s+[^\s=/>]+\s*=\s*(?:"[^"]*"|\'[^\']*\'))*\s*/?>',
+    re.DOTALL,
+)
+TIMESTAMP_ATTR_RE = re.compile(rb'(\stimestamp\s*=\s*)(?:"([^"]*)"|\'([^\']*)\')')
+
+# The fields strptime accepts for '%Y-%m-%dT%H:%M:%S[.%f]Z', with the 'Z' optional
+TIMESTAMP_RE = re.compile(
+    r'(\d{4})-(1[0-2]|0[1-9]|[1-9])-(3[01]|[12]\d|0[1-9]|[1-9]| [1-9])[Tt]'
+    r'(2[0-3]|[01]\d|\d):([0-5]\d|\d):(6[01]|[0-5]\d|\d)(?:\.(\d{1,6}))?Z?'
+)
+
+
+def parse_timestamp(timestamp_str):
+    """
+    Parses a JUnit timestamp, with or without fractional seconds and 'Z'.
+
+    Returns:
+        datetime.datetime: Naive UTC time, or None if it isn't a valid timestamp.
+    """
+    match = TIMESTAMP_RE.fullmatch(timestamp_str)
+    if match is None:
+        return None
+    year, month, day, hour, minute, second, fraction = match.groups()
+    try:
+        return datetime.datetime(
+            int(year), int(month), int(day), int(hour), int(minute), int(second),
+            int(fraction.ljust(6, '0')) if fraction else 0,
+        )
+    except ValueError:
+        return None
+
+
+def adjusted_timestamp(timestamp_str, base_time_dt, filepath=None):
+    """
+    Returns the value a timestamp attribute should have, or None to leave it as is.
+    """
+    if not timestamp_str:
+        # If no timestamp, set it to the base time
+        return base_time_dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    timestamp_dt = parse_timestamp(timestamp_str)
+    if timestamp_dt is None:
+        print(f"Warning: Could not parse timestamp '{timestamp_str}' in file '{filepath}'. Skipping this timestamp.")
+        return None
+
+    # If timestamp is earlier than the base time, adjust it
+    if timestamp_dt < base_time_dt:
+        timestamp_dt = base_time_dt
+    return timestamp_dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def rewrite_timestamps(content, base_time_dt, filepath=None):
+    """
+    Rewrites the timestamp attributes in raw XML bytes, leaving everything else byte for byte.
+
+    Returns:
+        bytes: The new content, or None if no timestamp changed.
+    """
+    changed = False
+
+    def rewrite_attribute(match):
+        nonlocal changed
+        raw = match.group(2) if match.group(2) is not None else match.group(3)
+        value = raw.decode('utf-8', 'replace')
+        if '&' in value:
+            value = html.unescape(value)
+        new_value = adjusted_timestamp(value, base_time_dt, filepath)
+        if new_value is None or new_value == value:
+            return match.group(0)
+        changed = True
+        return match.group(1) + b'"' + new_value.encode('ascii') + b'"'
+
+    def rewrite_tag(match):
+        tag = match.group(0)
+        if tag[1:2] in (b'!', b'?') or b'timestamp' not in tag:
+            return tag
+        return TIMESTAMP_ATTR_RE.sub(rewrite_attribute, tag)
+
+    new_content = TAG_RE.sub(rewrite_tag, content)
+    return new_content if changed else None
+
+
+class _NoTree:
+    # Parser target that builds nothing, expat still checks the markup
+    def close(self):
+        return None
+
+
+def is_well_formed(content):
+    """
+    Returns True if raw XML bytes parse, without building a tree.
+    """
+    parser = ET.XMLParser(target=_NoTree())
+    try:
+        parser.feed(content)
+        parser.close()
+    except ET.ParseError:
+        return False
+    return True
+
+
+# Adjust the timestamps of one XML file, raising them to at least base_time_dt.
+# Pass check=False if the file is already known to parse.
+def adjust_timestamps_in_xml_file(filepath, base_time_dt, check=True):
+    with open(filepath, 'rb') as f:
+        content = f.read()
+
+    # The rewrite is regex based, so never let it touch malformed or truncated XML
+    if check and not is_well_formed(content):
+        print(f"Warning: Could not parse XML file {filepath}. Skipping.")
+        return False
+
+    new_content = rewrite_timestamps(content, base_time_dt, filepath)
+    if new_content is None:
+        return False
+
+    # Write to a temporary file next to the original and swap it in atomically
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(filepath) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(new_content)
+        shutil.copymode(filepath, tmp_path)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    print(f"Adjusted timestamps in file: {filepath}")
+    return True
+
+
+def _adjust_job(job):
+    return adjust_timestamps_in_xml_file(*job)
 
 
 # Adjust timestamps in XML files to the current UTC time
-def adjust_timestamps_in_xml_files(directory):
+def adjust_timestamps_in_xml_files(directory, workers=1):
     # Get the current UTC time as the base time
-    base_time_dt = datetime.datetime.utcnow()
+    base_time_dt = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
 
     # Iterate over all XML files in the given directory
-    for filepath in glob.glob(os.path.join(directory, '*.xml')):
-        try:
-            tree = ET.parse(filepath)
-            root = tree.getroot()
-        except ET.ParseError:
-            print(f"Warning: Could not parse XML file {filepath}. Skipping.")
-            continue
-
-        # Collect all elements with 'timestamp' attributes
-        timestamped_elements = []
-
-        # Include the root element if it has a 'timestamp' attribute
-        if 'timestamp' in root.attrib:
-            timestamped_elements.append(root)
-
-        # Iterate over all elements to find those with 'timestamp' attributes
-        for elem in root.iter():
-            if 'timestamp' in elem.attrib:
-                timestamped_elements.append(elem)
-
-        # Adjust timestamps
-        for elem in timestamped_elements:
-            # Add 'Z' if missing and ensure the timestamp is in UTC format
-            timestamp_str = elem.get('timestamp')
-            if timestamp_str:
-                # Add 'Z' if missing
-                if not timestamp_str.endswith('Z'):
-                    timestamp_str += 'Z'
-                try:
-                    # Parse the timestamp
-                    timestamp_dt = datetime.datetime.strptime(timestamp_str, '%Y-%m-%dT%H:%M:%SZ')
-                except ValueError:
-                    # Handle timestamps with fractional seconds
-                    try:
-                        timestamp_dt = datetime.datetime.strptime(timestamp_str, '%Y-%m-%dT%H:%M:%S.%fZ')
-                    except ValueError:
-                        print(f"Warning: Could not parse timestamp '{timestamp_str}' in file '{filepath}'. Skipping this timestamp.")
-                        continue
-
-                # If timestamp is earlier than the base time, adjust it
-                if timestamp_dt < base_time_dt:
-                    timestamp_dt = base_time_dt
-
-                # Update the timestamp with 'Z' at the end
-                elem.set('timestamp', timestamp_dt.strftime('%Y-%m-%dT%H:%M:%SZ'))
-            else:
-                # If no timestamp, set it to the base time
-                elem.set('timestamp', base_time_dt.strftime('%Y-%m-%dT%H:%M:%SZ'))
-
-        # Write the modified XML back to the file
-        tree.write(filepath, encoding='utf-8', xml_declaration=True)
-        print(f"Adjusted timestamps in file: {filepath}")
+    jobs = [(filepath, base_time_dt) for filepath in glob.glob(os.path.join(directory, '*.xml'))]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            return sum(executor.map(_adjust_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    return sum(_adjust_job(job) for job in jobs)
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Adjust timestamps in XML files to the current UTC time.')
     parser.add_argument('directory', help='Directory containing XML files to adjust')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Parallel processes')
 
     args = parser.parse_args()
 
@@ -77,4 +173,5 @@ if __name__ == '__main__':
     if not os.path.isdir(directory):
         print(f"Error: Directory '{directory}' does not exist.")
         exit(1)
-    adjust_timestamps_in_xml_files(directory)
+    adjusted = adjust_timestamps_in_xml_files(directory, args.workers)
+    print(f"Adjusted timestamps in {adjusted} files")
@@ -0,0 +1,214 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import ingest_spreadsheet
+from fake_sheets import FakeClient
+from sheets_quota import SheetsQuota
+from synthetic_reports import generate_reports
+
+"""
+Benchmarks the ingest pipeline on synthetic Firebase Test Lab reports.
+
+For each scale factor the baseline volume (reports and distinct tests) is
+multiplied, reports are generated into a temporary directory, and every stage
+is timed and memory-profiled: aggregation (serial and process pool), rate
+calculation, totals, and the three Sheets updates against an in-memory fake
+that counts API calls, both one update at a time and coalesced through a
+SheetsSession. The Sheets stages run twice to cover both the first write and
+the update of an existing day. Finally the three updates are timed against a
+fake with per-call latency, one after another and then concurrently through
+the AsyncSheetsSink. Results are written as JSON.
+"""
+
+SPREADSHEET_TITLE = "Fenix and Focus - Automated Flaky & Failure Tracking"
+PROJECT_NAME = "Fenix"
+
+
+def measure(func, profile_memory=True):
+    """
+    Runs func once, returning (result, seconds, peak KiB or None).
+
+    Peak memory is traced with tracemalloc in this process only, so it doesn't
+    include pool workers, and tracing slows the timed run down.
+    """
+    if profile_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] // 1024 if profile_memory else None
+    finally:
+        if profile_memory:
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run_scale(scale, base, workers, work_dir, profile_memory=True, latency=0.05):
+    """
+    Generates one volume of reports and benchmarks every pipeline stage on it.
+
+    Returns:
+        dict: Volume description, per-stage timings/peaks and API call counts.
+    """
+    report_dir = os.path.join(work_dir, f"reports-x{scale}")
+    testcases = generate_reports(
+        report_dir,
+        reports=base["reports"] * scale,
+        suites=base["suites"],
+        cases=base["cases"],
+        test_pool=base["test_pool"] * scale,
+        flaky_ratio=base["flaky_ratio"],
+        failure_ratio=base["failure_ratio"],
+    )
+    report_bytes = sum(entry.stat().st_size for entry in os.scandir(report_dir))
+
+    stages = {}
+
+    def stage(name, func, client=None):
+        before = dict(client.calls) if client else {}
+        result, seconds, peak = measure(func, profile_memory)
+        stages[name] = {"seconds": round(seconds, 4), "peak_kib": peak}
+        if client:
+            stages[name]["api_calls"] = {k: v - before.get(k, 0) for k, v in client.calls.items() if v != before.get(k, 0)}
+        print(f"  x{scale} {name}: {seconds:.3f}s" + (f", peak {peak} KiB" if peak is not None else ""))
+        return result
+
+    test_data = stage("aggregate_serial", lambda: ingest_spreadsheet.aggregate_test_results(report_dir, workers=1))
+    stage("aggregate_parallel", lambda: ingest_spreadsheet.aggregate_test_results(report_dir, workers=workers))
+    aggregated_results = stage("calculate_rates", lambda: ingest_spreadsheet.calculate_rates(test_data))
+    daily_totals = stage("calculate_overall_totals", lambda: ingest_spreadsheet.calculate_overall_totals(aggregated_results))
+
+    csv_path = os.path.join(work_dir, f"aggregated-x{scale}.csv")
+    stage("write_csv", lambda: ingest_spreadsheet.write_aggregated_results_to_csv(aggregated_results, csv_path))
+
+    client = FakeClient()
+    client.spreadsheet(SPREADSHEET_TITLE).add_worksheet("Daily Totals", rows=1000, cols=7)
+    client.calls.clear()
+
+    for run in ("first_run", "second_run"):
+        stage(
+            f"sheets_trending_{run}",
+            lambda: ingest_spreadsheet.append_daily_per_test_issues_only(client, aggregated_results, PROJECT_NAME),
+            client,
+        )
+        stage(
+            f"sheets_cumulative_{run}",
+            lambda: ingest_spreadsheet.update_google_sheet_with_cumulative_data(client, aggregated_results, PROJECT_NAME),
+            client,
+        )
+        stage(
+            f"sheets_daily_totals_{run}",
+            lambda: ingest_spreadsheet.update_daily_totals_sheet(client, daily_totals, "Daily Totals", PROJECT_NAME),
+            client,
+        )
+
+    # The same updates planned and written through one SheetsSession
+    session_client = FakeClient()
+    session_client.spreadsheet(SPREADSHEET_TITLE).add_worksheet("Daily Totals", rows=1000, cols=7)
+    session_client.calls.clear()
+    project = {
+        "project_name": PROJECT_NAME,
+        "aggregated_results": aggregated_results,
+        "new_results": aggregated_results,
+        "daily_totals": daily_totals,
+    }
+    run_date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    for run in ("first_run", "second_run"):
+        stage(
+            f"sheets_session_{run}",
+            lambda: ingest_spreadsheet.update_sheets_for_projects(session_client, [project], run_date),
+            session_client,
+        )
+
+    # The three updates with round-trip latency, in turn and then concurrently
+    def sequential_updates(latency_client):
+        ingest_spreadsheet.append_daily_per_test_issues_only(latency_client, aggregated_results, PROJECT_NAME, run_date)
+        ingest_spreadsheet.update_google_sheet_with_cumulative_data(latency_client, aggregated_results, PROJECT_NAME)
+        ingest_spreadsheet.update_daily_totals_sheet(latency_client, daily_totals, "Daily Totals", PROJECT_NAME)
+
+    def concurrent_updates(latency_client):
+        # The fake is thread-safe, so every worksheet can share it
+        asyncio.run(ingest_spreadsheet.update_project_sheets(lambda: latency_client, project, run_date))
+
+    for name, func in (
+        ("sheets_sequential_latency", sequential_updates),
+        ("sheets_concurrent_latency", concurrent_updates),
+    ):
+        latency_client = FakeClient(latency)
+        latency_client.spreadsheet(SPREADSHEET_TITLE).add_worksheet("Daily Totals", rows=1000, cols=7)
+        stage(name, lambda: func(latency_client), latency_client)
+
+    shutil.rmtree(report_dir)
+
+    return {
+        "scale": scale,
+        "reports": base["reports"] * scale,
+        "testcases": testcases,
+        "unique_tests": len(aggregated_results),
+        "report_bytes": report_bytes,
+        "stages": stages,
+        "api_calls": dict(client.calls),
+        "session_api_calls": dict(session_client.calls),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the JUnit ingest pipeline on synthetic reports.")
+    parser.add_argument("--scales", default="1,10,100", help="Comma-separated volume multipliers (default: 1,10,100)")
+    parser.add_argument("--reports", type=int, default=20, help="Baseline number of reports (default: 20)")
+    parser.add_argument("--suites", type=int, default=2, help="Suites per report (default: 2)")
+    parser.add_argument("--cases", type=int, default=200, help="Testcases per suite (default: 200)")
+    parser.add_argument("--test-pool", type=int, default=600, help="Baseline distinct tests (default: 600)")
+    parser.add_argument("--flaky-ratio", type=float, default=0.05, help="Share of flaky testcases (default: 0.05)")
+    parser.add_argument("--failure-ratio", type=float, default=0.02, help="Share of failed testcases (default: 0.02)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Workers for the parallel aggregation")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per fake API call in the latency stages (default: 0.05)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc (faster, timings only)")
+    parser.add_argument("--output", default="benchmark_results.json", help="Results file (default: benchmark_results.json)")
+
+    args = parser.parse_args()
+
+    # Measure the pipeline itself, not the client-side quota throttling
+    ingest_spreadsheet.SHEETS_QUOTA = SheetsQuota(reads_per_minute=10 ** 9, writes_per_minute=10 ** 9)
+
+    base = {
+        "reports": args.reports,
+        "suites": args.suites,
+        "cases": args.cases,
+        "test_pool": args.test_pool,
+        "flaky_ratio": args.flaky_ratio,
+        "failure_ratio": args.failure_ratio,
+    }
+
+    work_dir = tempfile.mkdtemp(prefix="ingest-benchmark-")
+    try:
+        runs = []
+        for scale in [int(s) for s in args.scales.split(",")]:
+            print(f"Benchmarking x{scale} volume...")
+            runs.append(run_scale(scale, base, args.workers, work_dir, profile_memory=not args.no_memory, latency=args.latency))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "workers": args.workers,
+        "latency": args.latency,
+        "memory_profiled": not args.no_memory,
+        "baseline": base,
+        "runs": runs,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"Wrote benchmark results to {args.output}")
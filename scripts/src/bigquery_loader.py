@@ -0,0 +1,194 @@
+import re
+from datetime import date
+
+from google.cloud import bigquery
+
+"""
+Loads ingest results into BigQuery without going through CSV files.
+
+Typed rows are built straight from the pipeline's records (DailyTotals from
+calculate_overall_totals, TestResult from calculate_rates), with the rates
+the records derive from their run counts rather than "5.00%" strings.
+They replace a staging table through a load job, and one parameterized
+script refuses a staging table with duplicate keys, MERGEs it into
+production, and fails if the merged dates now have duplicate keys.
+
+Every function takes the BigQuery client as an argument, so a fake client
+can stand in for it.
+"""
+
+DAILY_TOTALS_SCHEMA = [
+    bigquery.SchemaField("Date", "DATE", mode="REQUIRED"),
+    bigquery.SchemaField("Total Runs", "INTEGER"),
+    bigquery.SchemaField("Flaky Runs", "INTEGER"),
+    bigquery.SchemaField("Failed Runs", "INTEGER"),
+    bigquery.SchemaField("Flaky Rate", "FLOAT"),
+    bigquery.SchemaField("Failure Rate", "FLOAT"),
+]
+DAILY_TOTALS_KEY = ["Date"]
+
+TEST_RESULTS_SCHEMA = [
+    bigquery.SchemaField("Date", "DATE", mode="REQUIRED"),
+    bigquery.SchemaField("Project", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("Class Name", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("Test Name", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("Total Runs", "INTEGER"),
+    bigquery.SchemaField("Flaky Runs", "INTEGER"),
+    bigquery.SchemaField("Failed Runs", "INTEGER"),
+    bigquery.SchemaField("Flaky Rate", "FLOAT"),
+    bigquery.SchemaField("Failure Rate", "FLOAT"),
+]
+TEST_RESULTS_KEY = ["Date", "Project", "Class Name", "Test Name"]
+
+# Table ids are formatted into SQL (BigQuery can't bind identifiers), so only
+# plain [project.]dataset.table names are accepted.
+_TABLE_ID = re.compile(r"^(?:[A-Za-z0-9_-]+\.)?[A-Za-z0-9_]+\.[A-Za-z0-9_]+$")
+
+
+def daily_totals_row(daily_totals):
+    """
+    Builds a typed row from the DailyTotals record calculate_overall_totals returns.
+    """
+    return {
+        "Date": daily_totals.date,
+        "Total Runs": daily_totals.total_runs,
+        "Flaky Runs": daily_totals.flaky_runs,
+        "Failed Runs": daily_totals.failed_runs,
+        "Flaky Rate": daily_totals.flaky_rate,
+        "Failure Rate": daily_totals.failure_rate,
+    }
+
+
+def test_result_rows(aggregated_results, run_date, project_name):
+    """
+    Builds typed per-test rows from the TestResult records calculate_rates returns.
+    """
+    return [
+        {
+            "Date": run_date,
+            "Project": project_name,
+            "Class Name": result.class_name,
+            "Test Name": result.test_name,
+            "Total Runs": result.total_runs,
+            "Flaky Runs": result.flaky_runs,
+            "Failed Runs": result.failed_runs,
+            "Flaky Rate": result.flaky_rate,
+            "Failure Rate": result.failure_rate,
+        }
+        for result in aggregated_results
+    ]
+
+
+def _quote(column):
+    return f"`{column}`"
+
+
+def merge_script(prod_table, staging_table, columns, key_columns):
+    """
+    Builds the duplicate guardrails around the MERGE of staging into prod.
+
+    The whole staging table is checked for duplicate keys before anything is
+    merged. After the MERGE, prod is checked only on the dates in the @dates
+    parameter, the ones this run merged: duplicates that already exist in
+    prod on other dates are not detected, since this run can't have caused
+    them.
+    """
+    for table in (prod_table, staging_table):
+        if not _TABLE_ID.match(table):
+            raise ValueError(f"Invalid BigQuery table id: {table}")
+
+    keys = ", ".join(_quote(c) for c in key_columns)
+    on = " AND ".join(f"T.{_quote(c)} = S.{_quote(c)}" for c in key_columns)
+    updates = ",\n      ".join(f"{_quote(c)} = S.{_quote(c)}" for c in columns if c not in key_columns)
+    insert_columns = ", ".join(_quote(c) for c in columns)
+    insert_values = ", ".join(f"S.{_quote(c)}" for c in columns)
+    return f"""
+IF EXISTS (
+  SELECT 1
+  FROM `{staging_table}`
+  GROUP BY {keys}
+  HAVING COUNT(*) > 1
+) THEN
+  RAISE USING MESSAGE = 'Duplicate rows detected in {staging_table}, nothing merged';
+END IF;
+
+MERGE `{prod_table}` T
+USING `{staging_table}` S
+ON {on}
+WHEN MATCHED THEN UPDATE SET
+      {updates}
+WHEN NOT MATCHED THEN INSERT ({insert_columns})
+VALUES ({insert_values});
+
+IF EXISTS (
+  SELECT 1
+  FROM `{prod_table}`
+  WHERE Date IN UNNEST(@dates)
+  GROUP BY {keys}
+  HAVING COUNT(*) > 1
+) THEN
+  RAISE USING MESSAGE = 'Duplicate rows detected in {prod_table} after MERGE';
+END IF;
+"""
+
+
+def load_and_merge(client, rows, schema, key_columns, staging_table, prod_table):
+    """
+    Replaces the staging table with rows and MERGEs it into prod.
+
+    Args:
+        client (bigquery.Client): BigQuery client.
+        rows (list): Typed rows, one dict per row keyed by column name.
+        schema (list): bigquery.SchemaField list of the tables.
+        key_columns (list): Columns identifying a row (must include "Date").
+        staging_table (str): Staging table id; must be a "_staging_" table,
+            since it is overwritten.
+        prod_table (str): Production table id.
+
+    Returns:
+        int: Number of rows loaded.
+
+    Raises:
+        ValueError: If a table id is invalid or the staging table isn't a staging table.
+        google.api_core.exceptions.GoogleAPICallError: If the load or the
+            script fails, including when a guardrail finds duplicates.
+    """
+    if not staging_table.rsplit(".", 1)[-1].startswith("_staging_"):
+        raise ValueError(f"Refusing to replace non-staging table: {staging_table}")
+    if not rows:
+        print(f"No rows to load into {prod_table}")
+        return 0
+    script = merge_script(prod_table, staging_table, [field.name for field in schema], key_columns)
+
+    load_config = bigquery.LoadJobConfig(
+        schema=schema,
+        source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+    )
+    client.load_table_from_json(rows, staging_table, job_config=load_config).result()
+    print(f"Loaded {len(rows)} rows into {staging_table}")
+
+    dates = sorted({date.fromisoformat(row["Date"]) for row in rows})
+    query_config = bigquery.QueryJobConfig(
+        query_parameters=[bigquery.ArrayQueryParameter("dates", "DATE", dates)],
+    )
+    client.query(script, job_config=query_config).result()
+    print(f"Merged {staging_table} into {prod_table}, no duplicates detected")
+    return len(rows)
+
+
+def load_daily_totals(client, daily_totals, staging_table, prod_table):
+    return load_and_merge(
+        client, [daily_totals_row(daily_totals)], DAILY_TOTALS_SCHEMA, DAILY_TOTALS_KEY, staging_table, prod_table
+    )
+
+
+def load_test_results(client, aggregated_results, run_date, project_name, staging_table, prod_table):
+    return load_and_merge(
+        client,
+        test_result_rows(aggregated_results, run_date, project_name),
+        TEST_RESULTS_SCHEMA,
+        TEST_RESULTS_KEY,
+        staging_table,
+        prod_table,
+    )
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+from datetime import datetime, timezone
+
+"""
+Groups symbolicated crashes into signature buckets.
+
+A signature is built from the top frames of the crashing thread in
+minidump-stackwalk's --cyborg JSON output: each frame is reduced to
+module!function with addresses, the trailing parameter list and template
+parameters stripped, so the same crash from different builds and devices
+hashes the same. Unsymbolicated "module + 0xoffset" frames keep their offset,
+the only thing telling them apart.
+A persistent index remembers every signature seen before, so only crashes
+with a new signature need to be announced. The updated index can be written
+to a separate file (--index-output) that is only promoted over the index
+once the announcement went out, so a failed notification doesn't mark its
+signatures as seen.
+"""
+
+DEFAULT_FRAMES = 5
+
+_ADDRESS = re.compile(r"0x[0-9a-fA-F]+")
+_TEMPLATE_ARGS = re.compile(r"<[^<>]*>")
+# "libc.so + 0x1234": an unsymbolicated frame, identified only by its offset
+_MODULE_OFFSET = re.compile(r"^\S+ \+ 0x[0-9a-fA-F]+$")
+# Qualifiers that may follow a method's parameter list
+_QUALIFIERS = re.compile(r"(?:\s*(?:const|volatile|noexcept|&&|&))+$")
+
+
+def strip_parameters(function):
+    """
+    Removes the trailing parameter list (and qualifiers) from a function name.
+
+    Only the balanced parentheses at the end of the name are removed, so
+    "(anonymous namespace)" scopes and the "()" of operator() are kept.
+    """
+    name = _QUALIFIERS.sub("", function)
+    if not name.endswith(")"):
+        return function
+    depth = 0
+    for i in range(len(name) - 1, -1, -1):
+        if name[i] == ")":
+            depth += 1
+        elif name[i] == "(":
+            depth -= 1
+            if depth == 0:
+                break
+    else:
+        # Unbalanced, leave the name alone
+        return function
+    prefix = name[:i].rstrip()
+    if not prefix or prefix.endswith("::") or prefix.endswith("operator"):
+        # "(anonymous namespace)" or the parentheses of operator(), not parameters
+        return function
+    return prefix
+
+
+def normalize_function(function):
+    """
+    Strips what varies between builds from a symbolicated function name.
+    """
+    function = (function or "").strip()
+    if _MODULE_OFFSET.match(function):
+        return function
+    function = _ADDRESS.sub("", function).strip()
+    # Collapse nested template arguments from the inside out
+    while True:
+        collapsed = _TEMPLATE_ARGS.sub("", function)
+        if collapsed == function:
+            break
+        function = collapsed
+    return strip_parameters(function).strip()
+
+
+def frame_signature(frame):
+    """
+    Returns "module!function" for a cyborg frame ("??" for unknown parts).
+    """
+    module = frame.get("module") or "??"
+    function = normalize_function(frame.get("function")) or "??"
+    return f"{module}!{function}"
+
+
+def crash_signature(crash, frames=DEFAULT_FRAMES):
+    """
+    Builds the signature of a cyborg crash report.
+
+    Returns:
+        tuple: (signature hash, signature text).
+    """
+    thread = crash.get("crashing_thread") or {}
+    top_frames = (thread.get("frames") or [])[:frames]
+    text = " | ".join(frame_signature(frame) for frame in top_frames) or "empty stack"
+    reason = (crash.get("crash_info") or {}).get("type")
+    if reason:
+        text = f"{reason}: {text}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16], text
+
+
+def bucket_crashes(json_files, frames=DEFAULT_FRAMES):
+    """
+    Groups cyborg JSON files by crash signature.
+
+    Returns:
+        dict: signature hash -> {"signature", "count", "dumps", "top_frame"},
+        largest bucket first.
+    """
+    buckets = {}
+    for json_file in json_files:
+        try:
+            with open(json_file, "r", encoding="utf-8") as f:
+                crash = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not read {json_file}: {e}")
+            continue
+
+        signature, text = crash_signature(crash, frames)
+        bucket = buckets.setdefault(signature, {
+            "signature": text,
+            "count": 0,
+            "dumps": [],
+            "top_frame": ((crash.get("crashing_thread") or {}).get("frames") or [{}])[0],
+        })
+        bucket["count"] += 1
+        bucket["dumps"].append(os.path.basename(json_file))
+
+    return dict(sorted(buckets.items(), key=lambda item: item[1]["count"], reverse=True))
+
+
+def load_index(path):
+    if not os.path.isfile(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def update_index(index, buckets, seen_on=None):
+    """
+    Records the buckets in the signature index.
+
+    Returns:
+        list: Hashes of the signatures that were not in the index before.
+    """
+    seen_on = seen_on or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    new_signatures = []
+    for signature, bucket in buckets.items():
+        entry = index.get(signature)
+        if entry is None:
+            new_signatures.append(signature)
+            entry = index[signature] = {"signature": bucket["signature"], "first_seen": seen_on, "count": 0}
+        entry["last_seen"] = seen_on
+        entry["count"] += bucket["count"]
+    return new_signatures
+
+
+def save_index(index, path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def copy_representatives(buckets, source_dir, dest_dir):
+    """
+    Copies the first dump's human-readable stack of each bucket to <signature>.txt.
+
+    Returns:
+        int: Number of files copied.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    copied = 0
+    for signature, bucket in buckets.items():
+        txt_file = os.path.join(source_dir, os.path.splitext(bucket["dumps"][0])[0] + ".txt")
+        if os.path.isfile(txt_file):
+            shutil.copyfile(txt_file, os.path.join(dest_dir, f"{signature}.txt"))
+            copied += 1
+    return copied
+
+
+def write_summary(buckets, new_signatures, summary_file):
+    """
+    Appends a Markdown summary with one entry per bucket.
+    """
+    with open(summary_file, "a", encoding="utf-8") as f:
+        f.write("## Crash Report Summary\n")
+        f.write(f"{sum(b['count'] for b in buckets.values())} crashes in {len(buckets)} signatures, "
+                f"{len(new_signatures)} new\n\n")
+        for signature, bucket in buckets.items():
+            frame = bucket["top_frame"]
+            marker = " :new:" if signature in new_signatures else ""
+            f.write(f"### {signature} ({bucket['count']} crashes){marker}\n")
+            f.write(f"- **Signature**: `{bucket['signature']}`\n")
+            f.write(f"- **File**: {frame.get('file') or 'N/A'}\n")
+            f.write(f"- **Function**: {frame.get('function') or 'N/A'}\n")
+            f.write(f"- **Module**: {frame.get('module') or 'N/A'}\n")
+            f.write(f"- **Dumps**: {', '.join(bucket['dumps'])}\n")
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bucket symbolicated crashes by signature.")
+    parser.add_argument("directory", help="Directory with minidump-stackwalk --cyborg .json files")
+    parser.add_argument("--index", default="crash_signature_index.json", help="Persistent signature index (default: crash_signature_index.json)")
+    parser.add_argument("--index-output",
+                        help="Write the updated index here instead of over --index, to be promoted "
+                             "once the new signatures have been reported")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES, help=f"Frames per signature (default: {DEFAULT_FRAMES})")
+    parser.add_argument("--buckets-output", help="Write the buckets as JSON to this file")
+    parser.add_argument("--representatives", help="Copy one .txt stack per bucket to this directory")
+
+    args = parser.parse_args()
+
+    buckets = bucket_crashes(sorted(glob.glob(os.path.join(args.directory, "*.json"))), args.frames)
+    index = load_index(args.index)
+    new_signatures = update_index(index, buckets)
+    save_index(index, args.index_output or args.index)
+
+    print(f"{sum(b['count'] for b in buckets.values())} crashes in {len(buckets)} signatures, {len(new_signatures)} new")
+    for signature in new_signatures:
+        print(f"New signature {signature}: {buckets[signature]['signature']}")
+
+    if args.buckets_output:
+        with open(args.buckets_output, "w", encoding="utf-8") as f:
+            json.dump(buckets, f, indent=1)
+
+    if args.representatives:
+        copy_representatives(buckets, args.directory, args.representatives)
+
+    summary_file = os.environ.get("GITHUB_STEP_SUMMARY")
+    if summary_file:
+        write_summary(buckets, new_signatures, summary_file)
+
+    github_output = os.environ.get("GITHUB_OUTPUT")
+    if github_output:
+        with open(github_output, "a", encoding="utf-8") as f:
+            f.write(f"crash_buckets={len(buckets)}\n")
+            f.write(f"new_signatures={len(new_signatures)}\n")
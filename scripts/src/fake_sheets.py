@@ -0,0 +1,250 @@
+import threading
+import time
+from collections import Counter
+
+import gspread
+from gspread.utils import a1_range_to_grid_range
+
+"""
+In-memory stand-in for the parts of gspread used by the ingest scripts.
+
+Every method that would hit the Sheets (or Drive) API is counted per name in
+FakeClient.calls, and can optionally sleep for a fixed latency, so benchmarks
+can measure API usage and the effect of round trips without credentials.
+Calls may come from several threads as long as each worksheet is only
+updated by one of them at a time.
+Cells are stored as the strings Sheets would display.
+"""
+
+
+def api_call(method):
+    def wrapper(self, *args, **kwargs):
+        self.client.record(method.__name__)
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+def _display(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return "" if value is None else str(value)
+
+
+def _split_range(range_name):
+    """
+    Splits "'Title'!A1:B2" into ("Title", "A1:B2").
+    """
+    if "!" not in range_name:
+        return None, range_name
+    title, a1 = range_name.rsplit("!", 1)
+    if title.startswith("'") and title.endswith("'"):
+        title = title[1:-1].replace("''", "'")
+    return title, a1
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, title, sheet_id, rows=1000, cols=26):
+        self.spreadsheet = spreadsheet
+        self.client = spreadsheet.client
+        self.title = title
+        self.id = sheet_id
+        self.row_count = int(rows)
+        self.col_count = int(cols)
+        self.cells = []
+
+    def _last_row(self):
+        for r in range(len(self.cells), 0, -1):
+            if any(self.cells[r - 1]):
+                return r
+        return 0
+
+    def _write(self, start_row, start_col, values):
+        for r, row in enumerate(values):
+            row_index = start_row + r
+            if row_index >= self.row_count:
+                raise gspread.exceptions.GSpreadException(f"Range exceeds grid limits: row {row_index + 1}")
+            while len(self.cells) <= row_index:
+                self.cells.append([])
+            target = self.cells[row_index]
+            for c, value in enumerate(row):
+                col_index = start_col + c
+                while len(target) <= col_index:
+                    target.append("")
+                target[col_index] = _display(value)
+
+    def _write_a1(self, a1, values):
+        grid = a1_range_to_grid_range(a1)
+        self._write(grid.get("startRowIndex", 0), grid.get("startColumnIndex", 0), values)
+
+    @api_call
+    def get_all_values(self):
+        rows = [list(row) for row in self.cells[:self._last_row()]]
+        width = max((len(row) for row in rows), default=0)
+        return [row + [""] * (width - len(row)) for row in rows]
+
+    @api_call
+    def row_values(self, row):
+        values = list(self.cells[row - 1]) if row <= len(self.cells) else []
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    @api_call
+    def col_values(self, col):
+        values = [row[col - 1] if col <= len(row) else "" for row in self.cells]
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    @api_call
+    def update(self, range_name=None, values=None, **kwargs):
+        # Accept both update(values, range_name) and the older update(range_name, values)
+        if isinstance(range_name, list):
+            range_name, values = values, range_name
+        self._write_a1(_split_range(range_name or "A1")[1], values)
+
+    @api_call
+    def append_row(self, values, **kwargs):
+        self._append([values])
+
+    @api_call
+    def append_rows(self, values, **kwargs):
+        self._append(values)
+
+    def _append(self, values):
+        start = self._last_row()
+        if start + len(values) > self.row_count:
+            self.row_count = start + len(values)
+        self._write(start, 0, values)
+
+    @api_call
+    def batch_clear(self, ranges):
+        for a1 in ranges:
+            grid = a1_range_to_grid_range(_split_range(a1)[1])
+            for r in range(grid.get("startRowIndex", 0), min(grid.get("endRowIndex", len(self.cells)), len(self.cells))):
+                row = self.cells[r]
+                for c in range(grid.get("startColumnIndex", 0), min(grid.get("endColumnIndex", len(row)), len(row))):
+                    row[c] = ""
+
+    @api_call
+    def add_rows(self, rows):
+        self.row_count += rows
+
+    @api_call
+    def delete_rows(self, start_index, end_index=None):
+        self._delete_rows(start_index - 1, end_index or start_index)
+
+    def _delete_rows(self, start, end):
+        del self.cells[start:end]
+        self.row_count -= end - start
+
+
+class FakeSpreadsheet:
+    def __init__(self, client, title):
+        self.client = client
+        self.title = title
+        self._worksheets = {}
+
+    def _by_id(self, sheet_id):
+        return next(ws for ws in self._worksheets.values() if ws.id == sheet_id)
+
+    @api_call
+    def worksheet(self, title):
+        if title not in self._worksheets:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return self._worksheets[title]
+
+    @api_call
+    def worksheets(self):
+        return list(self._worksheets.values())
+
+    @api_call
+    def add_worksheet(self, title, rows=1000, cols=26, **kwargs):
+        with self.client._lock:
+            ws = FakeWorksheet(self, title, len(self._worksheets) + 1, rows, cols)
+            self._worksheets[title] = ws
+        return ws
+
+    @api_call
+    def batch_update(self, body):
+        for request in body.get("requests", []):
+            if "deleteDimension" in request:
+                grid = request["deleteDimension"]["range"]
+                self._by_id(grid["sheetId"])._delete_rows(grid["startIndex"], grid["endIndex"])
+            elif "appendDimension" in request:
+                append = request["appendDimension"]
+                if append["dimension"] != "ROWS":
+                    raise NotImplementedError(f"Unsupported dimension: {append['dimension']}")
+                self._by_id(append["sheetId"]).row_count += append["length"]
+            else:
+                raise NotImplementedError(f"Unsupported request: {list(request)}")
+        return {}
+
+    @api_call
+    def values_batch_get(self, ranges, params=None):
+        value_ranges = []
+        for range_name in ranges:
+            # A bare sheet title ("'Title'") is the whole sheet
+            title, a1 = _split_range(range_name if "!" in range_name else f"{range_name}!")
+            ws = self._worksheets[title]
+            rows = [list(row) for row in ws.cells[:ws._last_row()]]
+            if a1:
+                grid = a1_range_to_grid_range(a1)
+                rows = [
+                    row[grid.get("startColumnIndex", 0):grid.get("endColumnIndex")]
+                    for row in rows[grid.get("startRowIndex", 0):grid.get("endRowIndex")]
+                ]
+            # Like the API, trailing empty cells and rows are left out
+            for row in rows:
+                while row and not row[-1]:
+                    row.pop()
+            value_range = {"range": range_name, "majorDimension": "ROWS"}
+            if any(rows):
+                value_range["values"] = rows
+            value_ranges.append(value_range)
+        return {"spreadsheetId": self.title, "valueRanges": value_ranges}
+
+    @api_call
+    def values_batch_update(self, body):
+        for data in body.get("data", []):
+            title, a1 = _split_range(data["range"])
+            self._worksheets[title]._write_a1(a1, data["values"])
+        return {}
+
+
+class FakeClient:
+    """
+    Fake gspread.Client holding spreadsheets in memory.
+
+    Args:
+        latency (float): Seconds each API call sleeps, to model round trips.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = Counter()
+        self.client = self
+        self._lock = threading.Lock()
+        self._spreadsheets = {}
+
+    def record(self, name):
+        with self._lock:
+            self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @api_call
+    def open(self, title):
+        return self.spreadsheet(title)
+
+    def spreadsheet(self, title):
+        """
+        Returns a spreadsheet without counting an API call (for test setup).
+        """
+        with self._lock:
+            if title not in self._spreadsheets:
+                self._spreadsheets[title] = FakeSpreadsheet(self, title)
+            return self._spreadsheets[title]
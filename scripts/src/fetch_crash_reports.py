@@ -0,0 +1,116 @@
+import argparse
+import os
+import re
+from datetime import datetime, timedelta, timezone
+
+from fetch_junit_reports import MATRIX_FILENAME, create_storage_client, run_concurrently
+
+"""
+Downloads the day's Android minidumps from a Firebase Test Lab bucket.
+
+The run directories of a day ("<YYYY-MM-DD>_...") are listed with a single
+prefix listing, and each run's matrix_ids.json and minidumps are picked out of
+that listing in memory. Runs with both are copied concurrently to
+crash_reports/<run directory>/, next to their matrix_ids.json, the layout the
+crash processing job expects.
+
+Set STORAGE_EMULATOR_HOST to point the client at a local fake GCS server.
+"""
+
+DEFAULT_APP_PACKAGE = "org.mozilla.fenix.debug"
+
+
+def minidump_pattern(app_package):
+    """
+    Matches "matrix_*/<device>/artifacts/sdcard/Android/data/<package>/minidumps/<name>.dmp".
+    """
+    return re.compile(
+        r"matrix_[^/]*/[^/]+/artifacts/sdcard/Android/data/"
+        + re.escape(app_package)
+        + r"/minidumps/[^/]+\.dmp"
+    )
+
+
+def list_crash_runs(client, bucket_name, prefix, app_package=DEFAULT_APP_PACKAGE):
+    """
+    Lists a prefix once and collects each run's matrix_ids.json and minidumps.
+
+    Args:
+        client (storage.Client): Shared storage client.
+        bucket_name (str): Name of the bucket.
+        prefix (str): Prefix the run directories start with (e.g. "2024-09-25_").
+        app_package (str): Android package whose minidumps directory is read.
+
+    Returns:
+        dict: run directory -> {"matrix": blob name or None, "dumps": [blob names]}.
+    """
+    dump_path = minidump_pattern(app_package)
+    runs = {}
+    for blob in client.list_blobs(bucket_name, prefix=prefix, fields="items(name),nextPageToken"):
+        parts = blob.name.split("/", 1)
+        if len(parts) != 2:
+            continue
+        run = runs.setdefault(parts[0], {"matrix": None, "dumps": []})
+        if parts[1] == MATRIX_FILENAME:
+            run["matrix"] = blob.name
+        elif dump_path.fullmatch(parts[1]):
+            run["dumps"].append(blob.name)
+    return runs
+
+
+def fetch_crash_reports(bucket_name, prefix, destination_folder, app_package=DEFAULT_APP_PACKAGE, workers=16, client=None):
+    """
+    Downloads matrix_ids.json and the minidumps of every run that has both.
+
+    Returns:
+        list: Local directories of the runs that were copied.
+    """
+    client = client or create_storage_client(workers)
+    bucket = client.bucket(bucket_name)
+
+    runs = list_crash_runs(client, bucket_name, prefix, app_package)
+    print(f"Found {len(runs)} run directories under gs://{bucket_name}/{prefix}")
+
+    copies = []
+    run_dirs = []
+    for run_dir, run in runs.items():
+        if run["matrix"] is None:
+            print(f"{MATRIX_FILENAME} not found in {run_dir}, skipping.")
+            continue
+        if not run["dumps"]:
+            print(f"No minidump files found in {run_dir}, skipping.")
+            continue
+
+        local_dir = os.path.join(destination_folder, run_dir)
+        os.makedirs(local_dir, exist_ok=True)
+        run_dirs.append(local_dir)
+        for blob_name in [run["matrix"]] + run["dumps"]:
+            copies.append((blob_name, os.path.join(local_dir, os.path.basename(blob_name))))
+        print(f"Found {len(run['dumps'])} minidump files in {run_dir}")
+
+    def download(copy):
+        blob_name, destination_file = copy
+        bucket.blob(blob_name).download_to_filename(destination_file)
+        print(f"Downloaded gs://{bucket_name}/{blob_name} to {destination_file}")
+
+    run_concurrently(download, copies, workers)
+    return run_dirs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download the day's Android minidumps from Cloud Storage.")
+    parser.add_argument("--bucket", default=os.environ.get("GCS_BUCKET_NAME"), help="Bucket to copy from (default: $GCS_BUCKET_NAME)")
+    parser.add_argument("--date", help="Date of the run directories, YYYY-MM-DD (default: yesterday, UTC)")
+    parser.add_argument("--app-package", default=DEFAULT_APP_PACKAGE, help=f"App package whose minidumps are copied (default: {DEFAULT_APP_PACKAGE})")
+    parser.add_argument("--dest", default="crash_reports", help="Destination directory (default: crash_reports)")
+    parser.add_argument("--workers", type=int, default=16, help="Concurrent downloads (default: 16)")
+
+    args = parser.parse_args()
+
+    if not args.bucket:
+        print("Error: GCS_BUCKET_NAME is not set.")
+        exit(1)
+
+    date_prefix = args.date or (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%d")
+    run_dirs = fetch_crash_reports(args.bucket, f"{date_prefix}_", args.dest, args.app_package, args.workers)
+    print(f"Copied minidumps from {len(run_dirs)} run directories to {args.dest}")
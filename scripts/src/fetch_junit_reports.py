@@ -0,0 +1,177 @@
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import requests
+from google.cloud import storage
+
+"""
+Downloads the day's FullJUnitReport.xml files from a Firebase Test Lab bucket.
+
+The dated prefix is listed once, server-side filtered down to the two files
+of each run, and the matrix_ids.json check and the report download of every
+run directory are done concurrently through one shared storage client. Runs
+whose matrixLabel is "try" are skipped in-process. A run that fails to
+download doesn't stop the others, but the script exits with an error once
+they are done unless --allow-partial is given, so missing reports never go
+unnoticed.
+
+Run directories are expected to be named "<YYYY-MM-DD>_..." under the bucket
+root. Set STORAGE_EMULATOR_HOST to point the client at a local fake GCS server.
+"""
+
+REPORT_FILENAME = "FullJUnitReport.xml"
+MATRIX_FILENAME = "matrix_ids.json"
+
+
+def create_storage_client(pool_size=16):
+    """
+    Creates a storage client whose HTTP session can keep pool_size connections open.
+
+    Returns:
+        storage.Client: Client to share between all download threads.
+    """
+    client = storage.Client()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    client._http.mount("https://", adapter)
+    client._http.mount("http://", adapter)
+    return client
+
+
+def list_run_files(client, bucket_name, prefix, filenames):
+    """
+    Lists a prefix once and groups the wanted files by run directory.
+
+    Args:
+        client (storage.Client): Shared storage client.
+        bucket_name (str): Name of the bucket.
+        prefix (str): Prefix the run directories start with (e.g. the date).
+        filenames (iterable): File names to keep, relative to the run directory.
+
+    Returns:
+        dict: run directory -> {file name: blob name}, in listing order.
+    """
+    wanted = set(filenames)
+    # Only list the wanted files directly under each run directory
+    names = sorted(wanted)
+    match_glob = f"*/{names[0]}" if len(names) == 1 else f"*/{{{','.join(names)}}}"
+    runs = {}
+    for blob in client.list_blobs(
+        bucket_name, prefix=prefix, match_glob=match_glob, fields="items(name),nextPageToken"
+    ):
+        parts = blob.name.split("/", 1)
+        if len(parts) == 2 and parts[1] in wanted:
+            runs.setdefault(parts[0], {})[parts[1]] = blob.name
+    return runs
+
+
+def is_try_run(matrix_ids):
+    """
+    Returns True if any matrix in a matrix_ids.json document has matrixLabel "try".
+    """
+    entries = matrix_ids.values() if isinstance(matrix_ids, dict) else matrix_ids
+    return any(
+        isinstance(entry, dict) and (entry.get("clientDetails") or {}).get("matrixLabel") == "try"
+        for entry in entries
+    )
+
+
+def run_concurrently(func, items, workers):
+    """
+    Maps func over items with a bounded thread pool, returning results in order.
+    """
+    items = list(items)
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
+
+def fetch_run_report(bucket, run_dir, files, destination_folder):
+    """
+    Copies one run's report, unless its matrix_ids.json marks it as a try run.
+
+    Returns:
+        str: Local path of the report, or None if the run was skipped.
+    """
+    report_name = files.get(REPORT_FILENAME)
+    if report_name is None:
+        return None
+
+    matrix_name = files.get(MATRIX_FILENAME)
+    if matrix_name is not None:
+        local_matrix_file = os.path.join(destination_folder, f"matrix_ids-{run_dir}.json")
+        content = bucket.blob(matrix_name).download_as_bytes()
+        with open(local_matrix_file, "wb") as f:
+            f.write(content)
+        print(f"Inspecting {local_matrix_file}")
+        try:
+            if is_try_run(json.loads(content)):
+                print(f"Skipping {report_name} because matrixLabel is 'try'")
+                return None
+        except ValueError:
+            print(f"Warning: could not parse {local_matrix_file}, proceeding with copy")
+    else:
+        print(f"Warning: {MATRIX_FILENAME} not found for {report_name}, proceeding with copy")
+
+    # Name the report after its run directory to avoid overwriting
+    destination_file = os.path.join(destination_folder, f"FullJUnitReport-{run_dir}.xml")
+    bucket.blob(report_name).download_to_filename(destination_file)
+    print(f"Downloaded gs://{bucket.name}/{report_name} to {destination_file}")
+    return destination_file
+
+
+def fetch_junit_reports(bucket_name, prefix, destination_folder, workers=16, client=None):
+    """
+    Downloads every non-try FullJUnitReport.xml under the prefix.
+
+    A run that fails to download is logged and the others are still fetched.
+
+    Returns:
+        tuple: (local paths of the downloaded reports, run directories that failed).
+    """
+    client = client or create_storage_client(workers)
+    bucket = client.bucket(bucket_name)
+    os.makedirs(destination_folder, exist_ok=True)
+
+    runs = list_run_files(client, bucket_name, prefix, [REPORT_FILENAME, MATRIX_FILENAME])
+    print(f"Found {len(runs)} run directories under gs://{bucket_name}/{prefix}")
+
+    def fetch(run):
+        run_dir, files = run
+        try:
+            return fetch_run_report(bucket, run_dir, files, destination_folder), None
+        except Exception as e:
+            print(f"Error: failed to fetch the report of {run_dir}: {e}")
+            return None, run_dir
+
+    outcomes = run_concurrently(fetch, runs.items(), workers)
+    reports = [path for path, _ in outcomes if path]
+    failed = [run_dir for _, run_dir in outcomes if run_dir]
+    return reports, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download the day's JUnit reports from Cloud Storage.")
+    parser.add_argument("--bucket", default=os.environ.get("BUCKET_NAME"), help="Bucket to copy from (default: $BUCKET_NAME)")
+    parser.add_argument("--prefix", help="Run directory prefix (default: yesterday's date, UTC)")
+    parser.add_argument("--dest", default="junit_reports", help="Destination directory (default: junit_reports)")
+    parser.add_argument("--workers", type=int, default=16, help="Concurrent downloads (default: 16)")
+    parser.add_argument("--allow-partial", action="store_true",
+                        help="Exit successfully even if some runs failed to download")
+
+    args = parser.parse_args()
+
+    if not args.bucket:
+        print("Error: no bucket given (use --bucket or set BUCKET_NAME).")
+        exit(1)
+
+    prefix = args.prefix or (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%d")
+    reports, failed = fetch_junit_reports(args.bucket, prefix, args.dest, workers=args.workers)
+    print(f"Downloaded {len(reports)} reports to {args.dest}")
+    if failed:
+        print(f"{'Warning' if args.allow_partial else 'Error'}: failed to fetch {len(failed)} runs: {', '.join(failed)}")
+        if not args.allow_partial:
+            exit(1)
@@ -0,0 +1,151 @@
+import argparse
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+"""
+Local per-test history of daily results, kept in SQLite.
+
+Each ingest run records one row per (date, project, class, test) so trends can
+be queried over any window without going through the Sheets API. Rows are keyed
+by project/class/test first, which makes "test X over the last N days" a single
+primary-key range scan; a secondary index on date serves per-day queries.
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS test_results (
+    date TEXT NOT NULL,
+    project TEXT NOT NULL,
+    class_name TEXT NOT NULL,
+    test_name TEXT NOT NULL,
+    total_runs INTEGER NOT NULL,
+    flaky_runs INTEGER NOT NULL,
+    failed_runs INTEGER NOT NULL,
+    PRIMARY KEY (project, class_name, test_name, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_test_results_date ON test_results (date, project);
+"""
+
+
+def open_history_store(path):
+    """
+    Opens (and creates if needed) the history database at the given path.
+
+    Returns:
+        sqlite3.Connection: Connection with the schema in place.
+    """
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def record_test_results(conn, run_date, project_name, aggregated_results):
+    """
+    Appends one day of per-test results for a project.
+
+    Re-running the same day replaces that day's rows instead of adding to them.
+
+    Args:
+        conn (sqlite3.Connection): Open history store.
+        run_date (str): Date of the runs (YYYY-MM-DD).
+        project_name (str): Name of the project.
+        aggregated_results (list): TestResult records from calculate_rates.
+
+    Returns:
+        int: Number of rows written.
+    """
+    rows = [
+        (run_date, project_name, r.class_name, r.test_name, r.total_runs, r.flaky_runs, r.failed_runs)
+        for r in aggregated_results
+    ]
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO test_results
+                (date, project, class_name, test_name, total_runs, flaky_runs, failed_runs)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (project, class_name, test_name, date) DO UPDATE SET
+                total_runs = excluded.total_runs,
+                flaky_runs = excluded.flaky_runs,
+                failed_runs = excluded.failed_runs
+            """,
+            rows,
+        )
+    return len(rows)
+
+
+def test_history(conn, project_name, class_name, test_name, start_date, end_date):
+    """
+    Returns the daily (date, total, flaky, failed) rows of a test in [start_date, end_date].
+    """
+    return conn.execute(
+        """
+        SELECT date, total_runs, flaky_runs, failed_runs
+        FROM test_results
+        WHERE project = ? AND class_name = ? AND test_name = ? AND date BETWEEN ? AND ?
+        ORDER BY date
+        """,
+        (project_name, class_name, test_name, start_date, end_date),
+    ).fetchall()
+
+
+def test_rates(conn, project_name, class_name, test_name, days=90, end_date=None):
+    """
+    Summarizes a test's flaky and failure rates over the last `days` days.
+
+    Args:
+        conn (sqlite3.Connection): Open history store.
+        project_name (str): Name of the project.
+        class_name (str): Test class name.
+        test_name (str): Test method name.
+        days (int): Window length, ending at end_date (inclusive).
+        end_date (str): Last date of the window (default: today, UTC).
+
+    Returns:
+        dict: Window bounds, days with data, run counters and rates.
+    """
+    end = end_date or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    start = (datetime.strptime(end, "%Y-%m-%d") - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    days_with_data, total_runs, flaky_runs, failed_runs = conn.execute(
+        """
+        SELECT COUNT(*), COALESCE(SUM(total_runs), 0), COALESCE(SUM(flaky_runs), 0), COALESCE(SUM(failed_runs), 0)
+        FROM test_results
+        WHERE project = ? AND class_name = ? AND test_name = ? AND date BETWEEN ? AND ?
+        """,
+        (project_name, class_name, test_name, start, end),
+    ).fetchone()
+
+    return {
+        "Start Date": start,
+        "End Date": end,
+        "Days": days_with_data,
+        "Total Runs": total_runs,
+        "Flaky Runs": flaky_runs,
+        "Failed Runs": failed_runs,
+        "Flaky Rate": flaky_runs / total_runs if total_runs else 0,
+        "Failure Rate": failed_runs / total_runs if total_runs else 0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the local per-test history store.")
+    parser.add_argument("--db", default=os.environ.get("HISTORY_DB", "test_history.db"), help="Path to the history database")
+    parser.add_argument("--project", required=True, help="Project name (e.g. Fenix)")
+    parser.add_argument("--class-name", required=True, help="Test class name")
+    parser.add_argument("--test-name", required=True, help="Test method name")
+    parser.add_argument("--days", type=int, default=90, help="Window length in days (default: 90)")
+    parser.add_argument("--end-date", help="Last date of the window, YYYY-MM-DD (default: today)")
+
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.db):
+        print(f"Error: History database '{args.db}' does not exist.")
+        exit(1)
+
+    conn = open_history_store(args.db)
+    rates = test_rates(conn, args.project, args.class_name, args.test_name, days=args.days, end_date=args.end_date)
+    print(
+        f"{args.class_name}.{args.test_name} ({args.project}) {rates['Start Date']}..{rates['End Date']}: "
+        f"{rates['Total Runs']} runs over {rates['Days']} days, "
+        f"flaky rate {rates['Flaky Rate']:.2%}, failure rate {rates['Failure Rate']:.2%}"
+    )
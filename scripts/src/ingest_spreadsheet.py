@@ -1,80 +1,210 @@
+import argparse
+import asyncio
 import os
 import glob
 import csv
-from junitparser import JUnitXml, Failure
-from collections import defaultdict
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
 import gspread
 import json
-import random
-import time
 
-from gspread.exceptions import APIError
+from gspread.utils import absolute_range_name, rowcol_to_a1
+from history_store import open_history_store, record_test_results
+from records import DailyTotals, TestResult, TestTable
+from report_manifest import ReportManifest, file_digest, report_directory
+from sheets_quota import SheetsQuota
+from sheets_session import SheetsSession
+from sheets_sink import AsyncSheetsSink
 
 
-def with_retries(func, *args, retries=10, backoff=3, max_sleep=120, **kwargs):
+# Shared read/write budget for every gspread call made by this script
+SHEETS_QUOTA = SheetsQuota.from_env()
+
+SPREADSHEET_TITLE = "Fenix and Focus - Automated Flaky & Failure Tracking"
+DAILY_TOTALS_SHEET = "Daily Totals"
+
+TRENDING_HEADERS = ["date", "project_name", "class_name", "test_name", "total_runs", "flaky_runs", "failed_runs"]
+
+
+def with_retries(func, *args, kind="write", **kwargs):
     """
-    Run a gspread operation with retries on quota (429) errors.
-    Exponential backoff with jitter to spread out retries.
-    
+    Run a gspread operation through the shared Sheets quota scheduler.
+    The call only waits when the per-minute budget for its kind is spent,
+    and quota (429) errors are retried after the server's Retry-After.
+
     Args:
         func: Function to execute
-        retries: Maximum number of retry attempts (default: 10)
-        backoff: Base backoff multiplier (default: 3)
-        max_sleep: Maximum sleep time in seconds (default: 120)
-    """
-    for attempt in range(1, retries + 1):
-        try:
-            return func(*args, **kwargs)
-        except APIError as e:
-            if "429" in str(e):
-                if attempt == retries:
-                    raise RuntimeError(f"Operation failed after {retries} retries due to quota errors")
-                # Cap sleep time to avoid extremely long waits
-                sleep_time = min(backoff ** attempt + random.uniform(0, 2), max_sleep)
-                print(f"[Retry {attempt}/{retries}] Quota exceeded. Sleeping {sleep_time:.1f}s")
-                time.sleep(sleep_time)
-            else:
-                raise
-    raise RuntimeError(f"Operation failed after {retries} retries due to quota errors")
-
-
-def aggregate_test_results(xml_directory):
-    test_data = defaultdict(
-        lambda: {"Total Runs": 0, "Flaky Runs": 0, "Failed Runs": 0}
-    )
+        kind: Quota bucket to charge, "read" or "write" (default: "write")
+    """
+    return SHEETS_QUOTA.call(kind, func, *args, **kwargs)
+
+
+_TESTCASE_PATH = ["testsuites", "testsuite", "testcase"]
+
+
+def iter_testcases(xml_file):
+    """
+    Streams the testcases of a JUnit report without building the whole tree.
+
+    Only ``<testcase>`` elements that sit directly under a ``<testsuite>`` of the
+    ``<testsuites>`` root are yielded, which is what JUnitXml iteration visits.
+    Each element is cleared and detached as soon as it has been read, so peak
+    memory is bounded by the largest single testcase rather than the report.
+
+    Args:
+        xml_file (str): Path to the JUnit XML report.
+
+    Yields:
+        tuple: (class_name, test_name, flaky_attr, failure_count) per testcase.
+    """
+    path = []
+    parents = []
+    for event, elem in ET.iterparse(xml_file, events=("start", "end")):
+        if event == "start":
+            path.append(elem.tag)
+            parents.append(elem)
+            continue
+
+        if path == _TESTCASE_PATH:
+            failure_count = sum(1 for child in elem if child.tag == "failure")
+            yield elem.get("classname"), elem.get("name"), elem.get("flaky"), failure_count
+
+        path.pop()
+        parents.pop()
+        if 1 <= len(parents) <= 2:
+            # Drop finished suites and cases so the tree never grows
+            elem.clear()
+            parents[-1].remove(elem)
+
+
+def aggregate_report(xml_file):
+    """
+    Counts the runs of every test in a single JUnit report.
+
+    The result is a compact partial: a TestTable holding one ID and three
+    counters per distinct test, cheap to send back from a worker process and
+    to fold into the overall totals with merge_partial_results.
+
+    Args:
+        xml_file (str): Path to the JUnit XML report.
+
+    Returns:
+        TestTable: Run counters of every test in the report.
+    """
+    partial = TestTable()
+    ids = partial.ids
+    total_runs = partial.total_runs
+    flaky_runs = partial.flaky_runs
+    failed_runs = partial.failed_runs
+
+    for class_name, test_name, flaky_attr, failure_count in iter_testcases(xml_file):
+        # Each distinct (class, test) pair is identified by a dense integer ID
+        class_ids = ids.get(class_name)
+        test_id = class_ids.get(test_name) if class_ids is not None else None
+        if test_id is None:
+            test_id = partial.test_id(class_name, test_name)
+
+        total_runs[test_id] += 1
+
+        if flaky_attr == "true" and failure_count == 1:
+            # This is a flaky test
+            flaky_runs[test_id] += 1
+        elif failure_count > 1 and flaky_attr is None:
+            # This is a failed test
+            failed_runs[test_id] += 1
+        # Else, it's a passed test; no action needed
+
+    return partial
+
+
+def merge_partial_results(test_data, partial):
+    """
+    Adds a partial result into the running test_data.
+
+    Args:
+        test_data (TestTable): Running totals.
+        partial (iterable): (class_name, test_name, total_runs, flaky_runs,
+            failed_runs) rows, from aggregate_report's rows() or a manifest entry.
+    """
+    test_data.add_rows(partial)
+
+
+def empty_test_data():
+    return TestTable()
+
+
+def aggregate_test_results(xml_directory, workers=1, manifest=None):
+    """
+    Aggregates run counts for every test across the JUnit reports in a directory.
+
+    Args:
+        xml_directory (str): Directory containing the XML files.
+        workers (int): Number of processes to parse reports with. With more than
+            one worker the reports are fanned out to a process pool and the
+            partial results are merged in file order, so the output is the same
+            as the serial path.
+        manifest (ReportManifest): Optional manifest of reports already counted.
+            Known reports are not reparsed, their stored counts are used
+            instead; new reports are staged in the manifest so the caller can
+            tell them apart (manifest.pending_counts) and save them once counted.
+
+    Returns:
+        TestTable: Run counters of every test, as consumed by calculate_rates.
+    """
+    test_data = empty_test_data()
 
     xml_files = glob.glob(os.path.join(xml_directory, "*.xml"))
 
-    for xml_file in xml_files:
-        xml = JUnitXml.fromfile(xml_file)
-        for suite in xml:
-            for case in suite:
-                test_name = case.name
-                class_name = case.classname
-                # Use a unique identifier for each test
-                test_id = f"{class_name}.{test_name}"
-
-                test_data[test_id]["Total Runs"] += 1
-
-                flaky_attr = case._elem.get("flaky")
-                failures = (
-                    [r for r in case.result if isinstance(r, Failure)]
-                    if case.result
-                    else []
-                )
-
-                if flaky_attr == "true" and len(failures) == 1:
-                    # This is a flaky test
-                    test_data[test_id]["Flaky Runs"] += 1
-                elif len(failures) > 1 and flaky_attr is None:
-                    # This is a failed test
-                    test_data[test_id]["Failed Runs"] += 1
-                # Else, it's a passed test; no action needed
+    partials = [None] * len(xml_files)
+    to_parse = []
+    digests = {}
+    for i, xml_file in enumerate(xml_files):
+        if manifest is not None:
+            digests[i] = file_digest(xml_file)
+            entry = manifest.lookup(digests[i], report_directory(xml_file))
+            if entry is not None:
+                partials[i] = entry["counts"]
+                continue
+        to_parse.append(i)
+
+    if manifest is not None:
+        print(f"{len(xml_files) - len(to_parse)} of {len(xml_files)} reports already ingested")
+
+    parse_files = [xml_files[i] for i in to_parse]
+    if workers > 1 and len(parse_files) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(parse_files))) as executor:
+            parsed = list(executor.map(aggregate_report, parse_files))
+    else:
+        # Serially each report is counted just before it is merged
+        parsed = map(aggregate_report, parse_files)
+
+    # Merge in file order, so tests get the same IDs on every path
+    parsed = iter(parsed)
+    for i, partial in enumerate(partials):
+        if partial is None:
+            partial = next(parsed).rows()
+            if manifest is not None:
+                partial = [list(row) for row in partial]
+                manifest.add(digests[i], report_directory(xml_files[i]), partial)
+        merge_partial_results(test_data, partial)
 
     return test_data
 
 
+def coalesce_row_ranges(rows):
+    """
+    Groups row numbers into contiguous (start, end) ranges, inclusive and sorted.
+    """
+    ranges = []
+    for row in sorted(rows):
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1][1] = row
+        else:
+            ranges.append([row, row])
+    return [tuple(r) for r in ranges]
+
+
 def append_daily_per_test_issues_only(
     client,
     aggregated_results,
@@ -89,171 +219,144 @@ def append_daily_per_test_issues_only(
     Behavior:
     - Removes existing rows for the given date+project (avoid duplicates)
     - Keeps only the last 7 days of data (rolling window)
+
+    The sheet is read once and all expired/duplicate rows are removed with a
+    single batch_update, so the refresh costs a constant number of API calls
+    regardless of how many rows expire.
     """
     run_date = run_date or (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%d")
     sheet_title = sheet_title or f"Trending Results - {project_name}"
-    keep_days = 7  # rolling window length
 
-    ss = client.open("Fenix and Focus - Automated Flaky & Failure Tracking")
+    ss = with_retries(client.open, SPREADSHEET_TITLE, kind="read")
 
     try:
-        ws = ss.worksheet(sheet_title)
+        ws = with_retries(ss.worksheet, sheet_title, kind="read")
     except gspread.exceptions.WorksheetNotFound:
-        ws = ss.add_worksheet(title=sheet_title, rows="1000", cols="7")
-        ws.update("A1:G1", [[
-            "date", "project_name", "class_name", "test_name",
-            "total_runs", "flaky_runs", "failed_runs"
-        ]])
-        time.sleep(2)
+        ws = with_retries(ss.add_worksheet, title=sheet_title, rows="1000", cols="7")
+        with_retries(ws.update, "A1:G1", [TRENDING_HEADERS])
+
+    # Load all current rows once; both cleanup passes are planned locally
+    values = with_retries(ws.get_all_values, kind="read")  # includes header
+    to_delete, clear_all, out_rows = plan_trending_update(values, aggregated_results, project_name, run_date)
+
+    if clear_all:
+        # Can't delete all rows — clear contents instead
+        last_row = len(values)
+        print(f"Would delete all {len(to_delete)} data rows. Using batch_clear instead.")
+        with_retries(ws.batch_clear, [f"A2:G{last_row}"])
+    elif to_delete:
+        # One batch_update with a deleteDimension per contiguous block,
+        # bottom-up so earlier deletions don't shift later ranges
+        requests = [
+            {
+                "deleteDimension": {
+                    "range": {
+                        "sheetId": ws.id,
+                        "dimension": "ROWS",
+                        "startIndex": start - 1,
+                        "endIndex": end,
+                    }
+                }
+            }
+            for start, end in reversed(coalesce_row_ranges(to_delete))
+        ]
+        print(f"Deleting {len(to_delete)} rows in {len(requests)} ranges from {sheet_title}")
+        with_retries(ss.batch_update, {"requests": requests})
+
+    if out_rows:
+        print(f"Appending {len(out_rows)} rows to {sheet_title}")
+        with_retries(ws.append_rows, out_rows, value_input_option="USER_ENTERED")
+
+
+def plan_trending_update(values, aggregated_results, project_name, run_date, keep_days=7):
+    """
+    Plans a trending sheet refresh from the sheet's current values.
 
-    # Load all current rows
-    values = with_retries(ws.get_all_values)  # includes header
-    time.sleep(2)  # Increased pause after read
+    Args:
+        values (list): Current sheet values (header included), as get_all_values returns.
+        aggregated_results (list): TestResult records of the run.
+        project_name (str): Name of the project.
+        run_date (str): Date of the runs (YYYY-MM-DD).
+        keep_days (int): Rolling window length.
+
+    Returns:
+        tuple: (to_delete, clear_all, out_rows): the 1-based sheet rows to
+        remove, whether that is every data row (which must be cleared rather
+        than deleted), and today's issue rows to append.
+    """
+    data_rows = values[1:]  # skip header
 
     # 1) Remove duplicates for today's date+project
-    if len(values) > 1:
-        to_delete_today = [
-            idx for idx, row in enumerate(values[1:], start=2)
-            if len(row) >= 2 and row[0] == run_date and row[1] == project_name
-        ]
-        if to_delete_today:
-            total_data_rows = len(values) - 1  # exclude header
-            if len(to_delete_today) >= total_data_rows:
-                # Can't delete all rows — clear contents instead
-                last_row = len(values)
-                print(f"Would delete all {total_data_rows} data rows (dupe check). Using batch_clear instead.")
-                with_retries(lambda: ws.batch_clear([f"A2:G{last_row}"]))
-                time.sleep(3)
-            else:
-                chunk_size = 5
-                for i in range(0, len(to_delete_today), chunk_size):
-                    chunk = to_delete_today[i:i + chunk_size]
-                    for r in reversed(chunk):
-                        with_retries(lambda: ws.delete_rows(r))
-                    time.sleep(3)
-
-    # Longer pause before next read operation
-    time.sleep(3)
+    to_delete = {
+        idx for idx, row in enumerate(data_rows, start=2)
+        if len(row) >= 2 and row[0] == run_date and row[1] == project_name
+    }
 
     # 2) Prune rows older than the 7-day window
     cutoff = (datetime.now(timezone.utc) - timedelta(days=keep_days)).strftime("%Y-%m-%d")
-    values_after_dupe_check = with_retries(ws.get_all_values)
-    time.sleep(2)
-    data_rows = values_after_dupe_check[1:]  # skip header
+    remaining = [(idx, row) for idx, row in enumerate(data_rows, start=2) if idx not in to_delete]
 
     # Only prune if there are real (non-empty) data rows
-    has_real_data = any(row[0].strip() for row in data_rows if row)
-    if len(values_after_dupe_check) > 1 and has_real_data:
-        to_delete_old = [
-            idx for idx, row in enumerate(data_rows, start=2)
+    has_real_data = any(row[0].strip() for _, row in remaining if row)
+    if has_real_data:
+        to_delete.update(
+            idx for idx, row in remaining
             if len(row) >= 1 and row[0] < cutoff
-        ]
-        if to_delete_old:
-            total_data_rows = len(data_rows)
-            if len(to_delete_old) >= total_data_rows:
-                # Can't delete all rows — clear contents instead
-                last_row = len(values_after_dupe_check)
-                print(f"Would delete all {total_data_rows} data rows (old row prune). Using batch_clear instead.")
-                with_retries(lambda: ws.batch_clear([f"A2:G{last_row}"]))
-                time.sleep(3)
-            else:
-                chunk_size = 5
-                for i in range(0, len(to_delete_old), chunk_size):
-                    chunk = to_delete_old[i:i + chunk_size]
-                    for r in reversed(chunk):
-                        with_retries(lambda: ws.delete_rows(r))
-                    time.sleep(3)
-
-    # Longer pause before append operation
-    time.sleep(3)
+        )
+
+    clear_all = bool(to_delete) and len(to_delete) >= len(data_rows)
 
     # 3) Append today's issue rows
-    out_rows = []
-    for r in aggregated_results:
-        flaky = int(r.get("Flaky Runs", 0))
-        failed = int(r.get("Failed Runs", 0))
-        if flaky > 0 or failed > 0:
-            out_rows.append([
-                run_date,
-                project_name,
-                r.get("Class Name", ""),
-                r.get("Test Name", ""),
-                int(r.get("Total Runs", 0)),
-                flaky,
-                failed,
-            ])
+    out_rows = [
+        [run_date, project_name, r.class_name, r.test_name, r.total_runs, r.flaky_runs, r.failed_runs]
+        for r in aggregated_results
+        if r.has_issues
+    ]
 
-    if out_rows:
-        # Append in smaller chunks
-        chunk_size = 50  # Reduced from larger batches
-        for i in range(0, len(out_rows), chunk_size):
-            chunk = out_rows[i:i + chunk_size]
-            print(f"Appending chunk {i // chunk_size + 1} of {(len(out_rows) + chunk_size - 1) // chunk_size} ({len(chunk)} rows)")
-            with_retries(lambda: ws.append_rows(chunk, value_input_option="USER_ENTERED"))
-            time.sleep(3)  # Increased pause after write
+    return to_delete, clear_all, out_rows
 
 
-def calculate_rates(test_data):
-    aggregated_results = []
+AGGREGATED_HEADERS = ["Class Name", "Test Name", "Total Runs", "Flaky Runs", "Failed Runs", "Flaky Rate", "Failure Rate"]
 
-    for test_id, data in test_data.items():
-        class_name, test_name = test_id.rsplit(".", 1)
-        total_runs = data["Total Runs"]
-        flaky_runs = data["Flaky Runs"]
-        failed_runs = data["Failed Runs"]
 
-        flaky_rate = flaky_runs / total_runs if total_runs else 0
-        failure_rate = failed_runs / total_runs if total_runs else 0
+def calculate_rates(test_data):
+    """
+    Returns one TestResult record per test in test_data (a TestTable).
 
-        aggregated_results.append(
-            {
-                "Class Name": class_name,
-                "Test Name": test_name,
-                "Total Runs": total_runs,
-                "Flaky Runs": flaky_runs,
-                "Failed Runs": failed_runs,
-                "Flaky Rate": f"{flaky_rate:.2%}",
-                "Failure Rate": f"{failure_rate:.2%}",
-            }
-        )
+    The records are passed on as they are; their rates are derived from the
+    counters and only formatted (format_rate) where CSV and Sheets rows are built.
+    """
+    return test_data.results()
 
-    return aggregated_results
 
+def format_rate(rate):
+    return f"{rate:.2%}"
 
-def write_aggregated_results_to_csv(aggregated_results, filename):
-    headers = [
-        "Class Name",
-        "Test Name",
-        "Total Runs",
-        "Flaky Runs",
-        "Failed Runs",
-        "Flaky Rate",
-        "Failure Rate",
+
+def aggregated_row(result):
+    """
+    Formats a TestResult as a row under AGGREGATED_HEADERS.
+    """
+    return [
+        result.class_name,
+        result.test_name,
+        result.total_runs,
+        result.flaky_runs,
+        result.failed_runs,
+        format_rate(result.flaky_rate),
+        format_rate(result.failure_rate),
     ]
 
+
+def write_aggregated_results_to_csv(aggregated_results, filename):
     with open(filename, mode="w", newline="", encoding="utf-8") as csv_file:
-        writer = csv.DictWriter(csv_file, fieldnames=headers)
-        writer.writeheader()
-        for result in aggregated_results:
-            writer.writerow(result)
+        writer = csv.writer(csv_file)
+        writer.writerow(AGGREGATED_HEADERS)
+        writer.writerows(aggregated_row(result) for result in aggregated_results)
 
 
 def calculate_overall_totals(aggregated_results):
-    total_runs = sum(int(result["Total Runs"]) for result in aggregated_results)
-    total_flaky_runs = sum(int(result["Flaky Runs"]) for result in aggregated_results)
-    total_failed_runs = sum(int(result["Failed Runs"]) for result in aggregated_results)
-
-    overall_flaky_rate = total_flaky_runs / total_runs if total_runs else 0
-    overall_failure_rate = total_failed_runs / total_runs if total_runs else 0
-
-    return {
-        "Date": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
-        "Total Runs": total_runs,
-        "Flaky Runs": total_flaky_runs,
-        "Failed Runs": total_failed_runs,
-        "Flaky Rate": f"{overall_flaky_rate:.2%}",
-        "Failure Rate": f"{overall_failure_rate:.2%}",
-    }
+    return DailyTotals.from_results(aggregated_results)
 
 
 def write_daily_totals_to_csv(daily_totals, filename):
@@ -270,14 +373,21 @@ def write_daily_totals_to_csv(daily_totals, filename):
     file_exists = os.path.isfile(filename)
 
     with open(filename, mode="a", newline="", encoding="utf-8") as csv_file:
-        writer = csv.DictWriter(csv_file, fieldnames=headers)
+        writer = csv.writer(csv_file)
 
         # Write headers only if the file doesn't exist
         if not file_exists:
-            writer.writeheader()
+            writer.writerow(headers)
 
         # Write the daily totals
-        writer.writerow(daily_totals)
+        writer.writerow([
+            daily_totals.date,
+            daily_totals.total_runs,
+            daily_totals.flaky_runs,
+            daily_totals.failed_runs,
+            format_rate(daily_totals.flaky_rate),
+            format_rate(daily_totals.failure_rate),
+        ])
 
 
 def authenticate_google_sheets():
@@ -301,162 +411,237 @@ def authenticate_google_sheets():
     return client
 
 
-def update_google_sheet_with_cumulative_data(client, csv_filename, project_name):
+def _to_int(value):
+    """
+    Parses a counter cell as returned by get_all_values ("" counts as 0).
     """
-    Updates the specified Google Sheet worksheet with cumulative data from the CSV file.
+    value = str(value).replace(",", "").strip()
+    return int(float(value)) if value else 0
+
+
+def diff_sheet_values(old_values, new_values):
+    """
+    Computes the cell ranges that differ between two sheet states.
+
+    Changed cells are first coalesced into contiguous runs within each row, then
+    runs spanning the same columns on consecutive rows are merged into a single
+    rectangular block, so a run of updated counters or a block of new rows
+    becomes one range.
+
+    Args:
+        old_values (list): Current sheet values as returned by get_all_values.
+        new_values (list): Desired sheet values, row-major from A1.
+
+    Returns:
+        tuple: (ranges, changed_cells) where ranges is a list of
+        {"range": "A2:G3", "values": [[...], ...]} dicts.
+    """
+    runs = []  # (row_index, start_col, end_col)
+    changed_cells = 0
+    for r, new_row in enumerate(new_values):
+        old_row = old_values[r] if r < len(old_values) else []
+        start = None
+        for c, value in enumerate(new_row):
+            old = old_row[c] if c < len(old_row) else ""
+            if str(value) != str(old):
+                changed_cells += 1
+                if start is None:
+                    start = c
+            elif start is not None:
+                runs.append((r, start, c - 1))
+                start = None
+        if start is not None:
+            runs.append((r, start, len(new_row) - 1))
+
+    blocks = []  # [first_row, last_row, start_col, end_col]
+    for r, start, end in runs:
+        last = blocks[-1] if blocks else None
+        if last and last[1] == r - 1 and last[2] == start and last[3] == end:
+            last[1] = r
+        else:
+            blocks.append([r, r, start, end])
+
+    ranges = []
+    for first_row, last_row, start, end in blocks:
+        a1 = f"{rowcol_to_a1(first_row + 1, start + 1)}:{rowcol_to_a1(last_row + 1, end + 1)}"
+        values = [new_values[r][start:end + 1] for r in range(first_row, last_row + 1)]
+        ranges.append({"range": a1, "values": values})
+
+    return ranges, changed_cells
+
+
+def update_google_sheet_with_cumulative_data(client, aggregated_results, project_name):
+    """
+    Updates the specified Google Sheet worksheet with cumulative data from the given results.
     Merges new test results with existing data without clearing the sheet.
 
+    The sheet is read once, the new cumulative state is computed locally and
+    diffed against that snapshot, and only the changed cells are pushed in a
+    single values_batch_update request.
+
     Args:
         client (gspread.Client): The authenticated gspread client.
-        csv_filename (str): Path to the CSV file containing aggregated results.
+        aggregated_results (list): TestResult records to add to the sheet.
         project_name (str): Name of the project (used to identify the correct worksheet).
+
+    Returns:
+        dict: Sync statistics (changed/total cells and requests made versus the
+        chunked update/append path this replaced).
     """
     # Define the sheet name for the project
     sheet_title = f"Aggregated Results - {project_name}"
+    spreadsheet = with_retries(client.open, SPREADSHEET_TITLE, kind="read")
+    requests_made = 0
 
     # Try to open the worksheet; if it doesn't exist, create it
     try:
-        sheet = client.open("Fenix and Focus - Automated Flaky & Failure Tracking").worksheet(sheet_title)
+        sheet = with_retries(spreadsheet.worksheet, sheet_title, kind="read")
     except gspread.exceptions.WorksheetNotFound:
-        sheet = client.open("Fenix and Focus - Automated Flaky & Failure Tracking").add_worksheet(title=sheet_title, rows="1000", cols="7")
-        time.sleep(2)
-
-    # Check if the first row (headers) exists; if not, add them
-    first_row = with_retries(lambda: sheet.row_values(1))
-    if not first_row:  # If the first row is empty, add headers
-        headers = ["Class Name", "Test Name", "Total Runs", "Flaky Runs", "Failed Runs", "Flaky Rate", "Failure Rate"]
-        with_retries(lambda: sheet.append_row(headers))
-        time.sleep(2)
-
-    # Read existing data from the sheet
-    existing_records = with_retries(lambda: sheet.get_all_records())
-    time.sleep(2)
-    
-    existing_data = {}
-    for idx, record in enumerate(existing_records, start=2):  # Start at row 2 because row 1 contains headers
-        test_id = f"{record['Class Name']}.{record['Test Name']}"
-        existing_data[test_id] = idx  # Store the row number for updating
+        sheet = with_retries(spreadsheet.add_worksheet, title=sheet_title, rows="1000", cols="7")
+        requests_made += 1
+
+    # Read the whole sheet (headers included) in one request
+    snapshot = with_retries(sheet.get_all_values, kind="read")
+    requests_made += 1
+
+    new_values, updated_rows, new_rows = cumulative_sheet_values(snapshot, aggregated_results)
+    ranges, changed_cells = diff_sheet_values(snapshot, new_values)
+
+    if ranges:
+        # Grow the grid first if the new rows don't fit
+        if len(new_values) > sheet.row_count:
+            with_retries(sheet.add_rows, len(new_values) - sheet.row_count)
+            requests_made += 1
+
+        data = [
+            {"range": absolute_range_name(sheet_title, r["range"]), "values": r["values"]}
+            for r in ranges
+        ]
+        with_retries(
+            spreadsheet.values_batch_update,
+            body={"valueInputOption": "USER_ENTERED", "data": data},
+        )
+        requests_made += 1
+
+    # What the previous row_values/get_all_records/chunked update/append flow would have cost
+    legacy_requests = 2 + (not snapshot or not any(snapshot[0]))
+    legacy_requests += -(-updated_rows // 25) + -(-new_rows // 50)
+    total_cells = len(new_values) * len(AGGREGATED_HEADERS)
+    stats = {
+        "changed_cells": changed_cells,
+        "total_cells": total_cells,
+        "ranges": len(ranges),
+        "requests": requests_made,
+        "legacy_requests": legacy_requests,
+    }
+    print(
+        f"Synced {sheet_title}: {changed_cells} of {total_cells} cells changed "
+        f"({total_cells - changed_cells} unchanged cells skipped) in {len(ranges)} ranges; "
+        f"{requests_made} requests instead of {legacy_requests}"
+    )
+    return stats
+
 
-    # Read data from CSV
-    with open(csv_filename, mode="r", newline="", encoding="utf-8") as csv_file:
-        reader = csv.DictReader(csv_file)
-        csv_data = list(reader)
+def cumulative_sheet_values(snapshot, aggregated_results):
+    """
+    Computes the new cumulative sheet state from its current values.
 
-    # Prepare batch updates and new rows for appending
-    batch_updates = []
-    new_rows = []
+    Args:
+        snapshot (list): Current sheet values, as get_all_values returns.
+        aggregated_results (list): TestResult records to add to the sheet.
+
+    Returns:
+        tuple: (new_values, updated_rows, new_rows)
+    """
+    # Build the new sheet state, starting from the current one
+    new_values = [list(row[:len(AGGREGATED_HEADERS)]) for row in snapshot]
+    if not new_values or not any(new_values[0]):
+        # If the first row is empty, add headers
+        new_values[:1] = [list(AGGREGATED_HEADERS)]
 
-    for row in csv_data:
-        test_id = f"{row['Class Name']}.{row['Test Name']}"
-        new_total_runs = int(row["Total Runs"])
-        new_flaky_runs = int(row["Flaky Runs"])
-        new_failed_runs = int(row["Failed Runs"])
+    existing_data = {}
+    for idx, row in enumerate(new_values[1:], start=1):
+        row.extend([""] * (len(AGGREGATED_HEADERS) - len(row)))
+        test_id = (row[0], row[1])
+        existing_data[test_id] = idx  # Store the row index for updating
+
+    updated_rows = 0
+    new_rows = 0
+    for result in aggregated_results:
+        test_id = (result.class_name, result.test_name)
+        total_runs = result.total_runs
+        flaky_runs = result.flaky_runs
+        failed_runs = result.failed_runs
 
         if test_id in existing_data:
-            # If the test already exists, update the existing row
-            row_num = existing_data[test_id]
-            # Retrieve current values from the sheet
-            current_total_runs = int(existing_records[row_num - 2]["Total Runs"])
-            current_flaky_runs = int(existing_records[row_num - 2]["Flaky Runs"])
-            current_failed_runs = int(existing_records[row_num - 2]["Failed Runs"])
-
-            # Calculate new cumulative values
-            cumulative_total_runs = current_total_runs + new_total_runs
-            cumulative_flaky_runs = current_flaky_runs + new_flaky_runs
-            cumulative_failed_runs = current_failed_runs + new_failed_runs
-
-            # Calculate rates
-            flaky_rate = f"{cumulative_flaky_runs / cumulative_total_runs:.2%}" if cumulative_total_runs else "0.00%"
-            failure_rate = f"{cumulative_failed_runs / cumulative_total_runs:.2%}" if cumulative_total_runs else "0.00%"
-
-            # Prepare the updated row data
-            updated_row = [
-                row["Class Name"],
-                row["Test Name"],
-                cumulative_total_runs,
-                cumulative_flaky_runs,
-                cumulative_failed_runs,
-                flaky_rate,
-                failure_rate,
-            ]
-
-            # Queue the update for this row
-            batch_updates.append({
-                'range': f'A{row_num}:G{row_num}',  # Update the corresponding row
-                'values': [updated_row]
-            })
+            # If the test already exists, accumulate onto the existing row
+            current = new_values[existing_data[test_id]]
+            total_runs += _to_int(current[2])
+            flaky_runs += _to_int(current[3])
+            failed_runs += _to_int(current[4])
+            updated_rows += 1
         else:
-            # If the test doesn't exist, prepare a new row to be appended
-            flaky_rate = f"{new_flaky_runs / new_total_runs:.2%}" if new_total_runs else "0.00%"
-            failure_rate = f"{new_failed_runs / new_total_runs:.2%}" if new_total_runs else "0.00%"
-
-            new_row = [
-                row["Class Name"],
-                row["Test Name"],
-                new_total_runs,
-                new_flaky_runs,
-                new_failed_runs,
-                flaky_rate,
-                failure_rate,
-            ]
-            new_rows.append(new_row)
-
-    # Execute batch updates for existing rows in smaller chunks
-    if batch_updates:
-        chunk_size = 25  # Reduced from 50 to minimize quota pressure
-        for i in range(0, len(batch_updates), chunk_size):
-            chunk = batch_updates[i:i + chunk_size]
-            print(f"Updating chunk {i // chunk_size + 1} of {(len(batch_updates) + chunk_size - 1) // chunk_size} ({len(chunk)} rows)")
-            with_retries(lambda: sheet.batch_update(chunk))
-            time.sleep(4)  # Increased from 2 seconds to 4 seconds
-
-    # Append new rows if there are any, in smaller chunks
-    if new_rows:
-        chunk_size = 50  # Reduced from 100
-        for i in range(0, len(new_rows), chunk_size):
-            chunk = new_rows[i:i + chunk_size]
-            print(f"Appending chunk {i // chunk_size + 1} of {(len(new_rows) + chunk_size - 1) // chunk_size} ({len(chunk)} rows)")
-            with_retries(lambda: sheet.append_rows(chunk, value_input_option='USER_ENTERED'))
-            time.sleep(4)  # Increased from 2 seconds to 4 seconds
+            # If the test doesn't exist, it becomes a new row at the end
+            existing_data[test_id] = len(new_values)
+            new_values.append(None)
+            new_rows += 1
+
+        cumulative = TestResult(result.class_name, result.test_name, total_runs, flaky_runs, failed_runs)
+        new_values[existing_data[test_id]] = [str(value) for value in aggregated_row(cumulative)]
+
+    return new_values, updated_rows, new_rows
 
 
 def update_daily_totals_sheet(client, daily_totals, sheet_name, project_name):
     # Open the worksheet for daily totals
-    sheet = client.open("Fenix and Focus - Automated Flaky & Failure Tracking").worksheet(sheet_name)
-    time.sleep(2)  # Increased pause after opening the sheet
+    spreadsheet = with_retries(client.open, SPREADSHEET_TITLE, kind="read")
+    sheet = with_retries(spreadsheet.worksheet, sheet_name, kind="read")
 
     # Check if headers exist; if not, add them
-    headers = [
-        "Date",
-        "Project Name",
-        "Total Runs",
-        "Flaky Runs",
-        "Failed Runs",
-        "Flaky Rate",
-        "Failure Rate",
-    ]
-
-    first_row = with_retries(lambda: sheet.row_values(1))
+    first_row = with_retries(sheet.row_values, 1, kind="read")
     if not first_row:
-        with_retries(lambda: sheet.append_row(headers))
-        time.sleep(2)  # Increased pause after writing headers
+        with_retries(lambda: sheet.append_row(DAILY_TOTALS_HEADERS))
 
     # Prepare the row data
-    row_data = [
-        daily_totals["Date"],
+    row_data = daily_totals_row(daily_totals, project_name)
+
+    # Read columns A (Date) and B (Project Name) to find existing row or determine next row
+    col_a_values = with_retries(sheet.col_values, 1, kind="read")  # Column A (Date)
+    col_b_values = with_retries(sheet.col_values, 2, kind="read")  # Column B (Project Name)
+    target_row = daily_totals_target_row(col_a_values, col_b_values, daily_totals.date, project_name)
+
+    # Update the target row using range notation
+    with_retries(lambda: sheet.update(range_name=f"A{target_row}:G{target_row}", values=[row_data], value_input_option="USER_ENTERED"))
+
+
+DAILY_TOTALS_HEADERS = [
+    "Date",
+    "Project Name",
+    "Total Runs",
+    "Flaky Runs",
+    "Failed Runs",
+    "Flaky Rate",
+    "Failure Rate",
+]
+
+
+def daily_totals_row(daily_totals, project_name):
+    return [
+        daily_totals.date,
         project_name,
-        daily_totals["Total Runs"],
-        daily_totals["Flaky Runs"],
-        daily_totals["Failed Runs"],
-        daily_totals["Flaky Rate"],
-        daily_totals["Failure Rate"],
+        daily_totals.total_runs,
+        daily_totals.flaky_runs,
+        daily_totals.failed_runs,
+        format_rate(daily_totals.flaky_rate),
+        format_rate(daily_totals.failure_rate),
     ]
 
-    # Read columns A (Date) and B (Project Name) to find existing row or determine next row
-    col_a_values = with_retries(lambda: sheet.col_values(1))  # Column A (Date)
-    col_b_values = with_retries(lambda: sheet.col_values(2))  # Column B (Project Name)
-    time.sleep(2)  # Pause after reading
 
+def daily_totals_target_row(col_a_values, col_b_values, date, project_name):
+    """
+    Returns the 1-based row holding (date, project_name) in the Daily Totals
+    sheet, or the row after the last data row if there is none yet.
+    """
     target_row = None
     last_data_row = 1  # Initialize to 1 (header row number) for 1-based row numbering
     
@@ -473,72 +658,326 @@ def update_daily_totals_sheet(client, daily_totals, sheet_name, project_name):
             last_data_row = i + 1  # Convert from 0-based array index to 1-based row number
             
         # Check if this row matches our (Date, Project Name)
-        if col_a_val == daily_totals["Date"] and col_b_val == project_name:
+        if col_a_val == date and col_b_val == project_name:
             target_row = i + 1  # Convert from 0-based array index to 1-based row number
             break
     
     # If no existing row found, use next row after last data row
     if target_row is None:
         target_row = last_data_row + 1
-    
-    # Update the target row using range notation
-    with_retries(lambda: sheet.update(range_name=f"A{target_row}:G{target_row}", values=[row_data], value_input_option="USER_ENTERED"))
-    time.sleep(2)
+    return target_row
 
 
-if __name__ == "__main__":
+def update_sheets_for_projects(client, projects, run_date):
+    """
+    Updates the Trending, Aggregated Results and Daily Totals worksheets of
+    several projects in one SheetsSession.
 
-    project_name = os.environ.get('PROJECT_NAME')
-    if not project_name:
-        raise Exception("PROJECT_NAME not found in environment variables.")
+    The spreadsheet is opened once, every worksheet involved is read with one
+    values_batch_get, and all the changes are planned locally with the same
+    rules as append_daily_per_test_issues_only,
+    update_google_sheet_with_cumulative_data and update_daily_totals_sheet,
+    then written with one batch_update (row deletions and grid growth) and
+    one values_batch_update, whatever the number of projects.
 
-    xml_directory = "junit_reports"  # Directory containing the XML files
-    test_data = aggregate_test_results(xml_directory)
+    Args:
+        client (gspread.Client): The authenticated gspread client.
+        projects (list): Dicts with the "project_name", "aggregated_results",
+            "new_results" (records of reports not yet in the cumulative
+            sheet) and "daily_totals" of each project.
+        run_date (str): Date of the runs (YYYY-MM-DD), for the trending rows.
+
+    Returns:
+        int: Number of API requests made.
+    """
+    session = SheetsSession(client, SPREADSHEET_TITLE, SHEETS_QUOTA)
+
+    titles = [DAILY_TOTALS_SHEET]
+    for project in projects:
+        titles.append(f"Trending Results - {project['project_name']}")
+        titles.append(f"Aggregated Results - {project['project_name']}")
+    worksheets = {}
+    created = set()
+    for title in titles:
+        worksheets[title], is_new = session.worksheet(title)
+        if is_new:
+            created.add(title)
+    values = session.read(titles)
+
+    daily_ws = worksheets[DAILY_TOTALS_SHEET]
+    daily_values = values[DAILY_TOTALS_SHEET]
+    if not daily_values or not any(daily_values[0]):
+        session.update(daily_ws, "A1:G1", [DAILY_TOTALS_HEADERS])
+        daily_values[:1] = [list(DAILY_TOTALS_HEADERS)]
+
+    for project in projects:
+        project_name = project["project_name"]
+
+        # Trending: drop duplicate/expired rows, then write today's issues after the kept rows
+        title = f"Trending Results - {project_name}"
+        ws = worksheets[title]
+        trending_values = values[title]
+        if title in created:
+            session.update(ws, "A1:G1", [TRENDING_HEADERS])
+            trending_values = [TRENDING_HEADERS]
+        to_delete, clear_all, out_rows = plan_trending_update(
+            trending_values, project["aggregated_results"], project_name, run_date
+        )
+        block = list(out_rows)
+        if clear_all:
+            # The data rows are overwritten (blanked where no new row lands) instead
+            block += [[""] * len(TRENDING_HEADERS)] * (len(to_delete) - len(out_rows))
+        elif to_delete:
+            session.delete_rows(ws, coalesce_row_ranges(to_delete))
+        kept_rows = len(trending_values) - len(to_delete)
+        if block:
+            session.ensure_rows(ws, kept_rows + len(block))
+            session.update(ws, f"A{kept_rows + 1}:G{kept_rows + len(block)}", block)
+        print(f"{title}: deleting {len(to_delete)} rows, appending {len(out_rows)}")
+
+        # Aggregated Results: only changed cells of the cumulative state
+        title = f"Aggregated Results - {project_name}"
+        if project["new_results"]:
+            ws = worksheets[title]
+            snapshot = values[title]
+            new_values, _, _ = cumulative_sheet_values(snapshot, project["new_results"])
+            ranges, changed_cells = diff_sheet_values(snapshot, new_values)
+            if ranges:
+                session.ensure_rows(ws, len(new_values))
+            for r in ranges:
+                session.update(ws, r["range"], r["values"])
+            print(f"{title}: {changed_cells} cells changed in {len(ranges)} ranges")
+        else:
+            print(f"No new reports for {project_name}; {title} left unchanged")
+
+        # Daily Totals: the sheet is shared, so later projects see the rows planned before them
+        row_data = daily_totals_row(project["daily_totals"], project_name)
+        target_row = daily_totals_target_row(
+            [row[0] if row else "" for row in daily_values],
+            [row[1] if len(row) > 1 else "" for row in daily_values],
+            project["daily_totals"].date,
+            project_name,
+        )
+        session.ensure_rows(daily_ws, target_row)
+        session.update(daily_ws, f"A{target_row}:G{target_row}", [row_data])
+        while len(daily_values) < target_row:
+            daily_values.append([""] * len(DAILY_TOTALS_HEADERS))
+        daily_values[target_row - 1] = [str(value) for value in row_data]
+
+    session.flush()
+    print(f"Updated the sheets of {len(projects)} projects in {session.requests_made} requests")
+    return session.requests_made
+
+
+async def update_project_sheets(client_factory, project, run_date):
+    """
+    Runs a project's trending, cumulative and daily totals updates
+    concurrently, one worker thread and client per worksheet, under the
+    shared quota.
+
+    Args:
+        client_factory: Callable returning a new authenticated gspread client,
+            such as authenticate_google_sheets.
+        project (dict): Project results, as returned by prepare_project.
+        run_date (str): Date of the runs (YYYY-MM-DD), for the trending rows.
+
+    Returns:
+        dict: "trending", "cumulative" (only if there were new results) and
+        "daily_totals" -> each update's return value or the exception it raised.
+    """
+    project_name = project["project_name"]
+    sink = AsyncSheetsSink(client_factory)
+
+    print(f"Updating trending, cumulative data and daily totals sheets for {project_name}...")
+    trending_title = f"Trending Results - {project_name}"
+    sink.submit(
+        trending_title, "trending", append_daily_per_test_issues_only,
+        project["aggregated_results"], project_name, run_date=run_date, sheet_title=trending_title,
+    )
+    if project["new_results"]:
+        sink.submit(
+            f"Aggregated Results - {project_name}", "cumulative", update_google_sheet_with_cumulative_data,
+            project["new_results"], project_name,
+        )
+    sink.submit(
+        DAILY_TOTALS_SHEET, "daily_totals", update_daily_totals_sheet,
+        project["daily_totals"], DAILY_TOTALS_SHEET, project_name,
+    )
+    return await sink.drain()
+
+
+def prepare_project(project_name, xml_directory, run_date, workers=1, output_dir=".",
+                    manifest_path="report_manifest.json", history_db="test_history.db"):
+    """
+    Aggregates one project's reports and writes its local outputs.
+
+    The per-test results and daily totals are written to CSV files in
+    output_dir and the per-test results are recorded in the history store.
+    The manifest is loaded but not saved; save it once the Sheets are updated.
+
+    Returns:
+        dict: project_name, aggregated_results, new_results (records of the
+        reports first seen in this run), daily_totals and manifest.
+    """
+    # Reports already counted by a previous run are neither reparsed nor re-added
+    manifest = ReportManifest.load(manifest_path)
+    test_data = aggregate_test_results(xml_directory, workers=workers, manifest=manifest)
     aggregated_results = calculate_rates(test_data)
 
     # Write per-test aggregated results to CSV
-    output_csv = "aggregated_test_results.csv"
-    write_aggregated_results_to_csv(aggregated_results, output_csv)
+    write_aggregated_results_to_csv(aggregated_results, os.path.join(output_dir, "aggregated_test_results.csv"))
+
+    # Only reports first seen in this run go into the cumulative sheet
+    new_test_data = empty_test_data()
+    for partial in manifest.pending_counts():
+        merge_partial_results(new_test_data, partial)
+    new_results = calculate_rates(new_test_data)
+    write_aggregated_results_to_csv(new_results, os.path.join(output_dir, "new_test_results.csv"))
 
     # Calculate daily totals and write to CSV
     daily_totals = calculate_overall_totals(aggregated_results)
-    daily_totals_csv = "daily_totals.csv"
-    write_daily_totals_to_csv(daily_totals, daily_totals_csv)
+    write_daily_totals_to_csv(daily_totals, os.path.join(output_dir, "daily_totals.csv"))
 
-    # Authenticate once and pass client to update functions
-    client = authenticate_google_sheets()
+    # Record per-test results in the local history store
+    history = open_history_store(history_db)
+    recorded = record_test_results(history, run_date, project_name, aggregated_results)
+    history.close()
+    print(f"Recorded {recorded} {project_name} test results for {run_date} in {history_db}")
 
-    # Append daily issues to the per-project worksheet
-    run_date = os.environ.get("RUN_DATE") or (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%d")
+    return {
+        "project_name": project_name,
+        "aggregated_results": aggregated_results,
+        "new_results": new_results,
+        "daily_totals": daily_totals,
+        "manifest": manifest,
+    }
 
-    try:
-        print(f"Updating trending sheet for {project_name}...")
-        append_daily_per_test_issues_only(
-            client=client,
-            aggregated_results=aggregated_results,
-            project_name=project_name,
-            run_date=run_date,
-            sheet_title=f"Trending Results - {project_name}",
+
+def load_into_bigquery(project, run_date):
+    """
+    Upserts a project's daily totals (and optionally per-test rows) into
+    BigQuery when BQ_PROJECT_ID is set.
+
+    Table names come from BQ_DAILY_TABLE / BQ_DAILY_STAGING_TABLE and
+    BQ_TESTS_TABLE / BQ_TESTS_STAGING_TABLE, where "{project}" is replaced by
+    the lowercased project name.
+    """
+    bq_project = os.environ.get("BQ_PROJECT_ID")
+    if not bq_project:
+        return
+    from google.cloud import bigquery
+    from bigquery_loader import load_daily_totals, load_test_results
+
+    def table(name):
+        return os.environ[name].replace("{project}", project["project_name"].lower())
+
+    bq_client = bigquery.Client(project=bq_project)
+    load_daily_totals(bq_client, project["daily_totals"], table("BQ_DAILY_STAGING_TABLE"), table("BQ_DAILY_TABLE"))
+    if os.environ.get("BQ_TESTS_TABLE"):
+        load_test_results(
+            bq_client, project["aggregated_results"], run_date, project["project_name"],
+            table("BQ_TESTS_STAGING_TABLE"), table("BQ_TESTS_TABLE"),
         )
-        print(f"Successfully updated trending sheet for {project_name}")
-    except Exception as e:
-        print(f"[Warning] Failed to update trending sheet for {project_name}: {e}")
 
-    # Add longer delay between major operations
-    time.sleep(5)
 
-    # Update Google Sheets with cumulative data
-    print(f"Updating cumulative data sheet for {project_name}...")
-    update_google_sheet_with_cumulative_data(client, output_csv, project_name)
-    print(f"Successfully updated cumulative data sheet for {project_name}")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate JUnit reports and update the tracking Google Sheet.")
+    parser.add_argument("xml_directory", nargs="?", default="junit_reports",
+                        help="Directory containing the XML files (default: junit_reports)")
+    parser.add_argument("--project", action="append", metavar="NAME=DIRECTORY",
+                        help="Ingest several projects in one Sheets session. DIRECTORY holds the project's "
+                             "junit_reports/, report_manifest.json and test_history.db, and receives its CSV files. "
+                             "Repeat for each project.")
+
+    args = parser.parse_args()
 
-    # Add longer delay between major operations
-    time.sleep(5)
+    workers = int(os.environ.get("AGGREGATE_WORKERS") or os.cpu_count() or 1)
+    run_date = os.environ.get("RUN_DATE") or (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%d")
+
+    if args.project:
+        specs = [spec.partition("=") for spec in args.project]
+        for project_name, sep, directory in specs:
+            if not sep or not project_name or not os.path.isdir(directory):
+                print(f"Error: Invalid --project '{project_name}{sep}{directory}'; "
+                      f"expected NAME=DIRECTORY with an existing directory.")
+                exit(1)
+
+        projects = []
+        for project_name, _, directory in specs:
+            projects.append(prepare_project(
+                project_name,
+                os.path.join(directory, "junit_reports"),
+                run_date,
+                workers=workers,
+                output_dir=directory,
+                manifest_path=os.path.join(directory, "report_manifest.json"),
+                history_db=os.path.join(directory, "test_history.db"),
+            ))
+
+        # One client and one spreadsheet session for every project
+        client = authenticate_google_sheets()
+        update_sheets_for_projects(client, projects, run_date)
+
+        # The new reports of every project are now counted; remember them for
+        # reruns before anything else can fail
+        for project in projects:
+            project["manifest"].prune()
+            project["manifest"].save()
+
+        failed = []
+        for project in projects:
+            try:
+                load_into_bigquery(project, run_date)
+            except Exception as e:
+                print(f"[Error] Failed to load {project['project_name']} into BigQuery: {e}")
+                failed.append(project["project_name"])
+
+        if failed:
+            print(f"Error: BigQuery loads failed for {', '.join(failed)}.")
+            exit(1)
+
+        print(f"Aggregated results of {len(projects)} projects written and Google Sheets updated.")
+        exit(0)
 
-    print(f"Updating daily totals sheet for {project_name}...")
-    update_daily_totals_sheet(client, daily_totals, "Daily Totals", project_name)
+    project_name = os.environ.get('PROJECT_NAME')
+    if not project_name:
+        raise Exception("PROJECT_NAME not found in environment variables.")
+
+    project = prepare_project(
+        project_name,
+        args.xml_directory,
+        run_date,
+        workers=workers,
+        manifest_path=os.environ.get("REPORT_MANIFEST", "report_manifest.json"),
+        history_db=os.environ.get("HISTORY_DB", "test_history.db"),
+    )
+
+    # The three worksheets are updated concurrently, each with its own client
+    outcomes = asyncio.run(update_project_sheets(authenticate_google_sheets, project, run_date))
+
+    if isinstance(outcomes["trending"], Exception):
+        print(f"[Warning] Failed to update trending sheet for {project_name}: {outcomes['trending']}")
+    else:
+        print(f"Successfully updated trending sheet for {project_name}")
+
+    if "cumulative" not in outcomes:
+        print(f"No new reports for {project_name}; cumulative data sheet left unchanged")
+    elif isinstance(outcomes["cumulative"], Exception):
+        raise outcomes["cumulative"]
+    else:
+        print(f"Successfully updated cumulative data sheet for {project_name}")
+
+    # The new reports are now counted; remember them for reruns
+    project["manifest"].prune()
+    project["manifest"].save()
+
+    if isinstance(outcomes["daily_totals"], Exception):
+        raise outcomes["daily_totals"]
     print(f"Successfully updated daily totals sheet for {project_name}")
 
+    # Upsert daily totals (and optionally per-test rows) into BigQuery
+    load_into_bigquery(project, run_date)
+
     print(
-        f"Aggregated test results have been written to {output_csv}, daily totals written to {daily_totals_csv}, and Google Sheets updated with cumulative data."
+        "Aggregated test results have been written to aggregated_test_results.csv, daily totals written to daily_totals.csv, and Google Sheets updated with cumulative data."
     )
@@ -1,79 +1,106 @@
-from google.cloud import storage
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import os
 
+from fetch_junit_reports import create_storage_client, run_concurrently
 
-def list_blobs_with_prefix(bucket_name, prefix, delimiter=None):
+
+def list_blobs_with_prefix(storage_client, bucket_name, prefix, delimiter=None):
     """Lists all the blobs in the bucket that begin with the prefix."""
-    storage_client = storage.Client()
-    blobs = storage_client.list_blobs(bucket_name, prefix=prefix, delimiter=delimiter)
+    blobs = storage_client.list_blobs(
+        bucket_name,
+        prefix=prefix,
+        delimiter=delimiter,
+        fields="items(name,timeCreated),prefixes,nextPageToken",
+    )
 
     return blobs
 
 
-def download_files(bucket_name, source_blob_names, destination_folder):
-    # Initialize the GCS client
-    client = storage.Client()
-
+def find_newest_run_directories(storage_client, bucket_name, report_filename, num_directories, window_days=7):
+    """
+    Finds the newest run directories and their report blobs.
+
+    Run directories are named after their date, so each day of the window is
+    listed once, newest day first, and the search stops as soon as enough
+    directories have been seen. Listing cost scales with the window rather
+    than with the bucket's history.
+
+    Returns:
+        list: (directory, [report blob names]) for the newest directories.
+    """
+    directories = {}  # directory -> creation time
+    reports = {}  # directory -> [report blob names]
+    today = datetime.now(timezone.utc).date()
+
+    for days_back in range(window_days):
+        day = (today - timedelta(days=days_back)).strftime("%Y-%m-%d")
+        for blob in list_blobs_with_prefix(storage_client, bucket_name, day):
+            if "/" not in blob.name:
+                continue
+            directory = blob.name.split("/", 1)[0] + "/"
+            if blob.name == directory:
+                # Directory placeholder: its creation time dates the run
+                directories[directory] = blob.time_created
+            elif blob.name.endswith(report_filename):
+                reports.setdefault(directory, []).append(blob.name)
+                directories.setdefault(directory, blob.time_created)
+
+        if len(directories) >= num_directories:
+            break
+
+    # Sort directories by creation time (newest first) and take the latest num_directories
+    sorted_directories = sorted(directories.items(), key=lambda x: x[1], reverse=True)[:num_directories]
+    return [(directory, reports.get(directory, [])) for directory, _ in sorted_directories]
+
+
+def download_files(storage_client, bucket_name, source_blob_names, destination_folder, workers=8):
     # Get the bucket
-    bucket = client.bucket(bucket_name)
-
-    for source_blob_name in source_blob_names:
-        # Get the blob
-        blob = bucket.blob(source_blob_name)
+    bucket = storage_client.bucket(bucket_name)
 
-        # Create the destination file path
-        destination_file_path = os.path.join(destination_folder, os.path.basename(source_blob_name))
+    def download(source_blob_name):
+        # Prefix the file with its run directory so reports don't overwrite each other
+        directory = os.path.dirname(source_blob_name).replace("/", "_")
+        filename = os.path.basename(source_blob_name)
+        if directory:
+            filename = f"{directory}-{filename}"
+        destination_file_path = os.path.join(destination_folder, filename)
 
         # Download the blob to the destination file
-        blob.download_to_filename(destination_file_path)
+        bucket.blob(source_blob_name).download_to_filename(destination_file_path)
         print(f"Downloaded {source_blob_name} to {destination_file_path}")
+        return destination_file_path
+
+    return run_concurrently(download, source_blob_names, workers)
 
 
 def main():
     bucket_name = "aaronmt-moz-tools-test"
     report_filename = "FullJUnitReport.xml"
-    destination_folder = os.getcwd()
     num_directories = 5
+    workers = 8
 
     # Create the destination folder with current date
     current_date = datetime.now().strftime("%Y-%m-%d")
     destination_folder = os.path.join(os.getcwd(), "reports", current_date)
     os.makedirs(destination_folder, exist_ok=True)
 
-    # List all objects with detailed metadata
-    storage_client = storage.Client()
-    blobs = storage_client.list_blobs(bucket_name)
-
-    # Filter blobs to get directories and their creation times
-    directories = {}
-    files = []
-    for blob in blobs:
-        if blob.name.endswith('/'):
-            directories[blob.name] = blob.time_created
-        elif blob.name.endswith(report_filename):
-            files.append(blob)
-
-    if directories:
-        # Sort directories by creation time (newest first) and take the latest num_directories
-        sorted_directories = sorted(directories.items(), key=lambda x: x[1], reverse=True)[:num_directories]
-
-        # Iterate over the newest directories and check for the report file
-        for directory, _ in sorted_directories:
-            # List files in the directory
-            blobs_in_directory = list_blobs_with_prefix(bucket_name, directory)
-
-            for blob in blobs_in_directory:
-                if blob.name.endswith(report_filename):
-                    # Download the report file
-                    download_files(bucket_name, [blob.name], destination_folder)
+    # One client (and connection pool) for listing and all downloads
+    storage_client = create_storage_client(workers)
+
+    newest_directories = find_newest_run_directories(storage_client, bucket_name, report_filename, num_directories)
+
+    if newest_directories:
+        report_blobs = [name for _, names in newest_directories for name in names]
+        download_files(storage_client, bucket_name, report_blobs, destination_folder, workers)
     else:
         # If no directories found, look for the newest FullJUnitReport.xml in the root
+        root_blobs = list_blobs_with_prefix(storage_client, bucket_name, None, delimiter="/")
+        files = [blob for blob in root_blobs if blob.name.endswith(report_filename)]
         if files:
             # Sort files by creation time (newest first)
             newest_file = sorted(files, key=lambda x: x.time_created, reverse=True)[0]
             # Download the newest report file
-            download_files(bucket_name, [newest_file.name], destination_folder)
+            download_files(storage_client, bucket_name, [newest_file.name], destination_folder, workers)
         else:
             print("No directories found and no FullJUnitReport.xml in the root directory.")
 
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+"""
+Symbolicates Firebase Test Lab minidumps with minidump-stackwalk.
+
+Every run directory's matrix_ids.json names the Gecko build (matrixLabel and
+geckoRev) whose symbols are needed. Symbols are kept in a persistent cache
+keyed by that pair, so directories sharing a build download and unzip the
+symbols once, and later runs reuse them. The cache is trimmed by total size,
+least recently used first. Dumps are then symbolicated concurrently.
+
+The symbols URL template and the stackwalker binary are configurable, so a
+local HTTP server and a stub stackwalker are enough to exercise it.
+"""
+
+SYMBOLS_URL_TEMPLATE = (
+    "https://firefox-ci-tc.services.mozilla.com/api/index/v1/task/"
+    "gecko.v2.{matrix_label}.revision.{gecko_rev}.mobile.android-aarch64-opt/"
+    "artifacts/public%2Fbuild%2Ftarget.crashreporter-symbols.zip"
+)
+SYMBOLS_SERVER = "https://symbols.mozilla.org"
+DOWNLOAD_TIMEOUT = 60
+CACHE_MARKER = ".cache-entry.json"
+
+
+def read_build_info(matrix_json_file):
+    """
+    Returns the (matrixLabel, geckoRev) of the first matrix that has both, or None.
+    """
+    with open(matrix_json_file, "r", encoding="utf-8") as f:
+        matrix_ids = json.load(f)
+
+    entries = matrix_ids.values() if isinstance(matrix_ids, dict) else matrix_ids
+    for entry in entries:
+        details = (entry or {}).get("clientDetails") or {}
+        if details.get("matrixLabel") and details.get("geckoRev"):
+            return details["matrixLabel"], details["geckoRev"]
+    return None
+
+
+def _directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+class SymbolCache:
+    """
+    Content-addressed cache of unzipped crash-reporter symbols.
+
+    Entries live in <root>/<sha256(matrixLabel:geckoRev)>/ with a marker file
+    recording the key and size; the marker's mtime is the entry's last use.
+
+    Args:
+        root (str): Cache directory.
+        max_bytes (int): Size the cache is trimmed down to by evict().
+        url_template (str): Symbols zip URL, formatted with matrix_label and gecko_rev.
+        timeout (float): Seconds a symbols download may stall (connecting or
+            between reads) before it is given up like any failed download.
+    """
+
+    def __init__(self, root, max_bytes, url_template=SYMBOLS_URL_TEMPLATE, timeout=DOWNLOAD_TIMEOUT):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.url_template = url_template
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._in_use = set()
+        self._locks = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def entry_path(self, matrix_label, gecko_rev):
+        digest = hashlib.sha256(f"{matrix_label}:{gecko_rev}".encode("utf-8")).hexdigest()
+        return os.path.join(self.root, digest)
+
+    def _key_lock(self, path):
+        with self._lock:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def get(self, matrix_label, gecko_rev):
+        """
+        Returns the symbols directory for a build, downloading it on a miss.
+
+        Concurrent requests for the same build wait for a single download.
+
+        Returns:
+            str: Path to the unzipped symbols, or None if they couldn't be fetched.
+        """
+        path = self.entry_path(matrix_label, gecko_rev)
+        marker = os.path.join(path, CACHE_MARKER)
+        with self._key_lock(path):
+            self._in_use.add(path)
+            if os.path.isfile(marker):
+                self.hits += 1
+                os.utime(marker)
+                print(f"Symbols for {matrix_label}@{gecko_rev} found in cache")
+                return path
+
+            self.misses += 1
+            url = self.url_template.format(matrix_label=matrix_label, gecko_rev=gecko_rev)
+            print(f"Downloading symbols from {url}")
+            tmp_dir = tempfile.mkdtemp(dir=self.root, prefix=".download-")
+            try:
+                zip_path = os.path.join(tmp_dir, "symbols.zip")
+                with urllib.request.urlopen(url, timeout=self.timeout) as response, open(zip_path, "wb") as f:
+                    shutil.copyfileobj(response, f, 1024 * 1024)
+                unzip_dir = os.path.join(tmp_dir, "symbols")
+                with zipfile.ZipFile(zip_path) as archive:
+                    archive.extractall(unzip_dir)
+                os.remove(zip_path)
+
+                with open(os.path.join(unzip_dir, CACHE_MARKER), "w", encoding="utf-8") as f:
+                    json.dump({
+                        "matrixLabel": matrix_label,
+                        "geckoRev": gecko_rev,
+                        "bytes": _directory_size(unzip_dir),
+                    }, f)
+                shutil.rmtree(path, ignore_errors=True)
+                os.replace(unzip_dir, path)
+            except (OSError, zipfile.BadZipFile) as e:
+                # Timeouts are OSErrors too
+                print(f"Failed to fetch symbols from {url}: {e}. Skipping...")
+                return None
+            finally:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            return path
+
+    def evict(self):
+        """
+        Deletes least recently used entries until the cache fits in max_bytes.
+
+        Entries used during this run are never evicted.
+
+        Returns:
+            int: Bytes freed.
+        """
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            marker = os.path.join(path, CACHE_MARKER)
+            if name.startswith(".") or not os.path.isfile(marker):
+                # Leftovers from an interrupted download
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            with open(marker, "r", encoding="utf-8") as f:
+                size = json.load(f).get("bytes", 0)
+            entries.append((os.path.getmtime(marker), size, path))
+
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for _, size, path in sorted(entries):
+            if total - freed <= self.max_bytes:
+                break
+            if path in self._in_use:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            freed += size
+            print(f"Evicted {os.path.basename(path)} ({size} bytes) from symbol cache")
+        return freed
+
+
+def stackwalk(stackwalker, dmp_file, symbols_dir, output_dir, symbols_server=SYMBOLS_SERVER):
+    """
+    Runs minidump-stackwalk on one dump, writing <name>.txt and <name>.json.
+
+    Returns:
+        bool: True if the stackwalker succeeded.
+    """
+    base_name = os.path.splitext(os.path.basename(dmp_file))[0]
+    human_output_file = os.path.join(output_dir, f"{base_name}.txt")
+    json_output_file = os.path.join(output_dir, f"{base_name}.json")
+
+    print(f"Processing minidump file: {dmp_file}")
+    result = subprocess.run(
+        [
+            stackwalker, dmp_file, symbols_dir,
+            "--symbols-url", symbols_server,
+            "--cyborg", json_output_file,
+            "--output-file", human_output_file,
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(f"minidump-stackwalk failed on {dmp_file}: {result.stderr.strip()}")
+        return False
+    print(f"Stackwalk outputs saved to {human_output_file} and {json_output_file}")
+    return True
+
+
+def process_crash_reports(input_dir, output_dir, cache, stackwalker="minidump-stackwalk", workers=4):
+    """
+    Symbolicates every minidump under <input_dir>/*/crash_reports/*/.
+
+    Returns:
+        int: Number of dumps processed successfully.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    project_dirs = sorted(glob.glob(os.path.join(input_dir, "*", "crash_reports", "*", "")))
+    if not project_dirs:
+        print(f"No projects found in {input_dir}.")
+        return 0
+
+    # Group run directories by the build whose symbols they need
+    builds = {}
+    for project_dir in project_dirs:
+        matrix_json_file = os.path.join(project_dir, "matrix_ids.json")
+        if not os.path.isfile(matrix_json_file):
+            print(f"No matrix_ids.json found in {project_dir}. Skipping...")
+            continue
+        build = read_build_info(matrix_json_file)
+        if build is None:
+            print(f"geckoRev or matrixLabel is empty in {matrix_json_file}. Skipping...")
+            continue
+        dumps = sorted(glob.glob(os.path.join(project_dir, "*.dmp")))
+        if not dumps:
+            print(f"No minidump files found in {project_dir}")
+            continue
+        builds.setdefault(build, []).extend(dumps)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Fetch each distinct build's symbols once, then walk its dumps
+        symbols = dict(zip(builds, executor.map(lambda build: cache.get(*build), builds)))
+        jobs = [
+            (dmp_file, symbols[build])
+            for build, dumps in builds.items() if symbols[build]
+            for dmp_file in dumps
+        ]
+        results = list(executor.map(
+            lambda job: stackwalk(stackwalker, job[0], job[1], output_dir),
+            jobs,
+        ))
+
+    print(f"Symbol cache: {cache.hits} hits, {cache.misses} misses for {len(builds)} builds")
+    return sum(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Symbolicate Firebase Test Lab minidumps with a persistent symbol cache.")
+    parser.add_argument("input_dir", help="Directory holding <project>/crash_reports/<run>/ folders")
+    parser.add_argument("--output", default="processed_crash_reports", help="Output directory (default: processed_crash_reports)")
+    parser.add_argument("--symbol-cache", default="symbol_cache", help="Symbol cache directory (default: symbol_cache)")
+    parser.add_argument("--cache-max-mb", type=int, default=3072, help="Symbol cache size limit in MB (default: 3072)")
+    parser.add_argument("--symbols-url-template", default=SYMBOLS_URL_TEMPLATE, help="Symbols zip URL with {matrix_label} and {gecko_rev}")
+    parser.add_argument("--download-timeout", type=float, default=DOWNLOAD_TIMEOUT,
+                        help=f"Seconds a symbols download may stall before it is skipped (default: {DOWNLOAD_TIMEOUT})")
+    parser.add_argument("--stackwalk", default="minidump-stackwalk", help="Stackwalker binary (default: minidump-stackwalk)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Concurrent stackwalk processes")
+
+    args = parser.parse_args()
+
+    start = time.monotonic()
+    cache = SymbolCache(
+        args.symbol_cache, args.cache_max_mb * 1024 * 1024, args.symbols_url_template, args.download_timeout
+    )
+    processed = process_crash_reports(args.input_dir, args.output, cache, args.stackwalk, args.workers)
+    cache.evict()
+    print(f"Processed {processed} minidumps in {time.monotonic() - start:.1f}s")
+
+    github_output = os.environ.get("GITHUB_OUTPUT")
+    if github_output:
+        with open(github_output, "a", encoding="utf-8") as f:
+            f.write(f"crash_stack_processed={'true' if processed else 'false'}\n")
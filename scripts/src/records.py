@@ -0,0 +1,185 @@
+import sys
+from datetime import datetime, timezone
+
+"""
+Typed records for the results that flow from aggregation to every sink.
+
+A TestResult holds a test's identity and its three run counters, and
+DailyTotals the same counters summed over a day. Both use __slots__, so a
+record costs a handful of pointers rather than a dict per test, and the rates
+are derived from the counters on demand. While reports are being counted the
+counters are kept column-wise in a TestTable, which hands out the records
+once counting is done. Nothing here is formatted: the "12.34%" strings are
+only produced where the CSV files and Sheets are written.
+"""
+
+
+def _intern(name):
+    # Names come from XML attributes and may be missing (None)
+    return sys.intern(name) if type(name) is str else name
+
+
+def rate(count, total_runs):
+    return count / total_runs if total_runs else 0.0
+
+
+class TestResult:
+    """
+    Run counters of one test.
+
+    Args:
+        class_name (str): Test class name.
+        test_name (str): Test method name.
+        total_runs (int): Runs of the test.
+        flaky_runs (int): Runs that passed on retry.
+        failed_runs (int): Runs that failed every attempt.
+    """
+
+    __slots__ = ("class_name", "test_name", "total_runs", "flaky_runs", "failed_runs")
+
+    def __init__(self, class_name, test_name, total_runs=0, flaky_runs=0, failed_runs=0):
+        self.class_name = class_name
+        self.test_name = test_name
+        self.total_runs = total_runs
+        self.flaky_runs = flaky_runs
+        self.failed_runs = failed_runs
+
+    @property
+    def flaky_rate(self):
+        return rate(self.flaky_runs, self.total_runs)
+
+    @property
+    def failure_rate(self):
+        return rate(self.failed_runs, self.total_runs)
+
+    @property
+    def has_issues(self):
+        return self.flaky_runs > 0 or self.failed_runs > 0
+
+    def __repr__(self):
+        return (
+            f"TestResult({self.class_name!r}, {self.test_name!r}, "
+            f"{self.total_runs}, {self.flaky_runs}, {self.failed_runs})"
+        )
+
+
+class DailyTotals:
+    """
+    Run counters of every test on one date.
+
+    Args:
+        date (str): Date of the totals (YYYY-MM-DD).
+        total_runs (int): Runs of all tests.
+        flaky_runs (int): Flaky runs of all tests.
+        failed_runs (int): Failed runs of all tests.
+    """
+
+    __slots__ = ("date", "total_runs", "flaky_runs", "failed_runs")
+
+    def __init__(self, date, total_runs=0, flaky_runs=0, failed_runs=0):
+        self.date = date
+        self.total_runs = total_runs
+        self.flaky_runs = flaky_runs
+        self.failed_runs = failed_runs
+
+    @classmethod
+    def from_results(cls, results, date=None):
+        """
+        Sums the counters of TestResult records (date defaults to today, UTC).
+        """
+        totals = cls(date or datetime.now(timezone.utc).strftime("%Y-%m-%d"))
+        for result in results:
+            totals.total_runs += result.total_runs
+            totals.flaky_runs += result.flaky_runs
+            totals.failed_runs += result.failed_runs
+        return totals
+
+    @property
+    def flaky_rate(self):
+        return rate(self.flaky_runs, self.total_runs)
+
+    @property
+    def failure_rate(self):
+        return rate(self.failed_runs, self.total_runs)
+
+    def __repr__(self):
+        return f"DailyTotals({self.date!r}, {self.total_runs}, {self.flaky_runs}, {self.failed_runs})"
+
+
+class TestTable:
+    """
+    Run counters of many tests, keyed by a dense integer ID per test.
+
+    Each (class_name, test_name) pair gets the next ID the first time it is
+    seen, with both names interned, and its counters live at that index in
+    three parallel integer lists. IDs are looked up through a class name ->
+    test name -> ID index, so counting a testcase allocates no key. A table
+    therefore grows with the number of distinct tests, not with the number
+    of testcases counted into it, and a test name containing dots never has
+    to be split back out of a joined key.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.class_names = []
+        self.test_names = []
+        self.total_runs = []
+        self.flaky_runs = []
+        self.failed_runs = []
+
+    def __len__(self):
+        return len(self.class_names)
+
+    def test_id(self, class_name, test_name):
+        """
+        Returns the ID of a test, assigning the next one if it is new.
+        """
+        class_ids = self.ids.get(class_name)
+        if class_ids is None:
+            class_ids = self.ids[_intern(class_name)] = {}
+        test_id = class_ids.get(test_name)
+        if test_id is None:
+            test_name = _intern(test_name)
+            test_id = class_ids[test_name] = len(self.test_names)
+            self.class_names.append(_intern(class_name))
+            self.test_names.append(test_name)
+            self.total_runs.append(0)
+            self.flaky_runs.append(0)
+            self.failed_runs.append(0)
+        return test_id
+
+    def add_rows(self, rows):
+        """
+        Adds (class_name, test_name, total_runs, flaky_runs, failed_runs) rows.
+        """
+        test_id = self.test_id
+        total = self.total_runs
+        flaky = self.flaky_runs
+        failed = self.failed_runs
+        for class_name, test_name, total_runs, flaky_runs, failed_runs in rows:
+            i = test_id(class_name, test_name)
+            total[i] += total_runs
+            flaky[i] += flaky_runs
+            failed[i] += failed_runs
+
+    def rows(self):
+        """
+        Yields (class_name, test_name, total_runs, flaky_runs, failed_runs) in ID order.
+        """
+        return zip(self.class_names, self.test_names, self.total_runs, self.flaky_runs, self.failed_runs)
+
+    def results(self):
+        """
+        Returns one TestResult record per test, in ID order.
+        """
+        return [TestResult(*row) for row in self.rows()]
+
+    def __getstate__(self):
+        # The ID index is rebuilt on unpickling rather than sent between processes
+        return self.class_names, self.test_names, self.total_runs, self.flaky_runs, self.failed_runs
+
+    def __setstate__(self, state):
+        self.class_names, self.test_names, self.total_runs, self.flaky_runs, self.failed_runs = state
+        self.ids = {}
+        for test_id, (class_name, test_name) in enumerate(zip(self.class_names, self.test_names)):
+            self.ids.setdefault(class_name, {})[test_name] = test_id
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+"""
+Manifest of JUnit reports that have already been counted.
+
+Each report is identified by the SHA-256 of its contents and by the GCS run
+directory it was copied from (encoded in the FullJUnitReport-<dir>.xml name).
+The manifest also keeps the per-test partial counts of every report, so a
+rerun can rebuild the day's totals without reparsing anything and only the
+reports it has never seen are added to the cumulative sheet.
+
+Counts are stored as [class_name, test_name, total, flaky, failed] rows, so
+test names containing dots round-trip. Version 1 manifests, which keyed the
+counts by a joined "class.test" id, are converted on load.
+"""
+
+REPORT_PREFIX = "FullJUnitReport-"
+MANIFEST_VERSION = 2
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """
+    Returns the hex SHA-256 digest of a file, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def report_directory(path):
+    """
+    Returns the GCS run directory encoded in a downloaded report's file name.
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    return name[len(REPORT_PREFIX):] if name.startswith(REPORT_PREFIX) else name
+
+
+class ReportManifest:
+    """
+    Content-hash manifest of ingested reports and their partial counts.
+
+    Args:
+        path (str): JSON file the manifest is loaded from and saved to.
+        entries (dict): digest -> {"directory", "ingested_on", "counts"}, where
+            counts is a list of [class_name, test_name, total, flaky, failed] rows.
+    """
+
+    def __init__(self, path, entries=None):
+        self.path = path
+        self.entries = entries or {}
+        self.directories = {entry["directory"]: digest for digest, entry in self.entries.items()}
+        self.pending = {}
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.isfile(path):
+            return cls(path)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        entries = data.get("reports", {})
+        if data.get("version", 1) < 2:
+            for entry in entries.values():
+                entry["counts"] = [
+                    [*test_id.rsplit(".", 1), *counters] for test_id, counters in entry["counts"].items()
+                ]
+        return cls(path, entries)
+
+    def lookup(self, digest, directory):
+        """
+        Returns the stored entry for a report if it was already counted.
+
+        A report matches on its content digest or, if the file was re-uploaded
+        with different contents, on its run directory.
+        """
+        entry = self.entries.get(digest) or self.pending.get(digest)
+        if entry is not None:
+            return entry
+        known_digest = self.directories.get(directory)
+        if known_digest is not None:
+            print(f"Warning: {directory} was already ingested with different contents; keeping the counted results")
+            return self.entries.get(known_digest) or self.pending.get(known_digest)
+        return None
+
+    def add(self, digest, directory, counts, ingested_on=None):
+        """
+        Stages a newly parsed report; it is only persisted by save().
+        """
+        entry = {
+            "directory": directory,
+            "ingested_on": ingested_on or datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+            "counts": counts,
+        }
+        self.pending[digest] = entry
+        self.directories[directory] = digest
+        return entry
+
+    def pending_counts(self):
+        """
+        Yields the partial counts of reports first seen in this run.
+        """
+        for entry in self.pending.values():
+            yield entry["counts"]
+
+    def prune(self, keep_days=7):
+        """
+        Drops entries ingested more than keep_days ago.
+        """
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=keep_days)).strftime("%Y-%m-%d")
+        self.entries = {d: e for d, e in self.entries.items() if e["ingested_on"] >= cutoff}
+        self.directories = {e["directory"]: d for d, e in {**self.entries, **self.pending}.items()}
+
+    def save(self):
+        """
+        Commits the staged reports and writes the manifest atomically.
+        """
+        self.entries.update(self.pending)
+        self.pending = {}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "reports": self.entries}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,166 @@
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from gspread.exceptions import APIError
+
+"""
+Client-side scheduler for the Google Sheets API per-minute quotas.
+
+Reads and writes each have their own token bucket sized to the per-user quota,
+so a call only sleeps when the budget for its kind is actually spent instead
+of after every request. A bucket starts with a small burst and refills with
+the rest of the quota, so no 60-second window, including the first one of a
+cold start, sees more calls than the quota allows. Quota errors (429) pause the bucket for the time the
+server asks for in Retry-After, falling back to a short jittered backoff.
+"""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket allowing at most rate_per_minute calls in any minute.
+
+    The bucket holds up to `capacity` tokens (default: a twelfth of the rate)
+    and starts full, and refills continuously at rate_per_minute - capacity,
+    so a full burst plus a minute of refill stays within rate_per_minute.
+    Callers reserve tokens up front and sleep outside the lock, so concurrent
+    callers queue up fairly behind each other instead of polling.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.capacity = capacity if capacity is not None else rate_per_minute // 12
+        if not 0 <= self.capacity < rate_per_minute:
+            raise ValueError(f"Bucket capacity must be in [0, {rate_per_minute}), got {self.capacity}")
+        self.rate = (rate_per_minute - self.capacity) / 60.0
+        self.tokens = float(self.capacity)
+        self.blocked_until = 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """
+        Takes tokens from the bucket, sleeping only if the budget is spent.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self.tokens -= tokens
+            wait = max(self.blocked_until - now, -self.tokens / self.rate, 0.0)
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        """
+        Blocks the bucket for the given number of seconds and empties it.
+        """
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self.tokens = min(self.tokens, 0.0)
+            self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+def retry_after_seconds(error):
+    """
+    Returns the Retry-After delay of an APIError in seconds, or None if absent.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def is_quota_error(error):
+    return getattr(error, "code", None) == 429 or "429" in str(error)
+
+
+class SheetsQuota:
+    """
+    Shared read/write quota budget for gspread calls.
+
+    Args:
+        reads_per_minute (int): Read requests allowed per minute (default: 60,
+            the Sheets per-user quota).
+        writes_per_minute (int): Write requests allowed per minute (default: 60).
+        retries (int): Maximum attempts for a call that keeps hitting 429s.
+        max_sleep (float): Upper bound for a single backoff when the server
+            does not send Retry-After.
+    """
+
+    def __init__(self, reads_per_minute=60, writes_per_minute=60, retries=10, max_sleep=120, sleep=time.sleep):
+        self.buckets = {
+            "read": TokenBucket(reads_per_minute, sleep=sleep),
+            "write": TokenBucket(writes_per_minute, sleep=sleep),
+        }
+        self.retries = retries
+        self.max_sleep = max_sleep
+        self.calls = {"read": 0, "write": 0}
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """
+        Builds a quota from SHEETS_READS_PER_MINUTE / SHEETS_WRITES_PER_MINUTE.
+        """
+        return cls(
+            reads_per_minute=int(os.environ.get("SHEETS_READS_PER_MINUTE", 60)),
+            writes_per_minute=int(os.environ.get("SHEETS_WRITES_PER_MINUTE", 60)),
+        )
+
+    def call(self, kind, func, *args, **kwargs):
+        """
+        Runs a gspread operation once its quota bucket has budget for it.
+
+        Args:
+            kind (str): "read" or "write".
+            func: Function to execute.
+        """
+        bucket = self.buckets[kind]
+        for attempt in range(1, self.retries + 1):
+            waited = bucket.acquire()
+            with self._lock:
+                self.waited += waited
+                self.calls[kind] += 1
+            try:
+                return func(*args, **kwargs)
+            except APIError as e:
+                if not is_quota_error(e):
+                    raise
+                if attempt == self.retries:
+                    raise RuntimeError(f"Operation failed after {self.retries} retries due to quota errors")
+                sleep_time = retry_after_seconds(e)
+                if sleep_time is None:
+                    sleep_time = min(2 ** attempt + random.uniform(0, 1), self.max_sleep)
+                print(f"[Retry {attempt}/{self.retries}] {kind.capitalize()} quota exceeded. Pausing {sleep_time:.1f}s")
+                bucket.pause(sleep_time)
+        raise RuntimeError(f"Operation failed after {self.retries} retries due to quota errors")
+
+    def read(self, func, *args, **kwargs):
+        return self.call("read", func, *args, **kwargs)
+
+    def write(self, func, *args, **kwargs):
+        return self.call("write", func, *args, **kwargs)
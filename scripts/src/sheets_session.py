@@ -0,0 +1,127 @@
+from gspread.utils import absolute_range_name, fill_gaps
+
+"""
+A spreadsheet session shared by every Sheets update of an ingest run.
+
+The spreadsheet is opened once and its worksheet handles are listed once and
+cached. Reads of several worksheets go out as a single values_batch_get, and
+writes are queued instead of sent: structural changes (row deletions, grid
+growth) are collected into one spreadsheet.batch_update and cell values into
+one values_batch_update, so updating any number of worksheets for any number
+of projects costs two write requests. Values keep the USER_ENTERED input
+option, so dates and "12.34%" rates are parsed by Sheets as before.
+"""
+
+
+class SheetsSession:
+    """
+    Args:
+        client (gspread.Client): The authenticated gspread client.
+        title (str): Title of the spreadsheet to open.
+        quota (SheetsQuota): Budget every call is charged to.
+    """
+
+    def __init__(self, client, title, quota):
+        self.quota = quota
+        self.spreadsheet = quota.call("read", client.open, title)
+        self.requests_made = 1
+        self._worksheets = None
+        self._row_counts = {}
+        self.requests = []
+        self.data = []
+
+    def worksheet(self, title, rows=1000, cols=7):
+        """
+        Returns a cached worksheet handle, creating the worksheet if it is missing.
+
+        Returns:
+            tuple: (worksheet, created)
+        """
+        if self._worksheets is None:
+            worksheets = self.quota.call("read", self.spreadsheet.worksheets)
+            self.requests_made += 1
+            self._worksheets = {ws.title: ws for ws in worksheets}
+
+        ws = self._worksheets.get(title)
+        if ws is not None:
+            return ws, False
+        ws = self.quota.call("write", self.spreadsheet.add_worksheet, title=title, rows=str(rows), cols=str(cols))
+        self.requests_made += 1
+        self._worksheets[title] = ws
+        return ws, True
+
+    def read(self, titles):
+        """
+        Reads several whole worksheets in one request.
+
+        Returns:
+            dict: title -> rows, padded to a rectangle like get_all_values.
+        """
+        response = self.quota.call(
+            "read", self.spreadsheet.values_batch_get, [absolute_range_name(title) for title in titles]
+        )
+        self.requests_made += 1
+        values = {}
+        for title, value_range in zip(titles, response.get("valueRanges", [])):
+            rows = value_range.get("values", [])
+            values[title] = fill_gaps(rows) if rows else []
+        return values
+
+    def row_count(self, ws):
+        return self._row_counts.get(ws.title, ws.row_count)
+
+    def delete_rows(self, ws, ranges):
+        """
+        Queues the deletion of (start, end) 1-based inclusive row ranges.
+
+        Ranges are deleted bottom-up so earlier deletions don't shift later ones.
+        """
+        for start, end in sorted(ranges, reverse=True):
+            self.requests.append({
+                "deleteDimension": {
+                    "range": {"sheetId": ws.id, "dimension": "ROWS", "startIndex": start - 1, "endIndex": end}
+                }
+            })
+            self._row_counts[ws.title] = self.row_count(ws) - (end - start + 1)
+
+    def ensure_rows(self, ws, rows):
+        """
+        Queues growing the grid so it has at least `rows` rows.
+        """
+        missing = rows - self.row_count(ws)
+        if missing > 0:
+            self.requests.append({"appendDimension": {"sheetId": ws.id, "dimension": "ROWS", "length": missing}})
+            self._row_counts[ws.title] = rows
+
+    def update(self, ws, a1, values):
+        """
+        Queues a cell range write, applied after the queued structural changes.
+        """
+        self.data.append({"range": absolute_range_name(ws.title, a1), "values": values})
+
+    def flush(self):
+        """
+        Sends the queued structural changes and value writes, one request each.
+
+        Returns:
+            int: Number of write requests made.
+        """
+        writes = 0
+        if self.requests:
+            self.quota.call("write", self.spreadsheet.batch_update, {"requests": self.requests})
+            writes += 1
+        if self.data:
+            self.quota.call(
+                "write",
+                self.spreadsheet.values_batch_update,
+                body={"valueInputOption": "USER_ENTERED", "data": self.data},
+            )
+            writes += 1
+        print(
+            f"Flushed {len(self.requests)} structural changes and {len(self.data)} value ranges "
+            f"in {writes} write requests"
+        )
+        self.requests_made += writes
+        self.requests = []
+        self.data = []
+        return writes
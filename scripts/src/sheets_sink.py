@@ -0,0 +1,73 @@
+import asyncio
+
+"""
+Runs blocking gspread updates concurrently from asyncio.
+
+Each submitted update runs in a worker thread (asyncio.to_thread), so updates
+of different worksheets overlap their round trips and a run takes about as
+long as its slowest update instead of the sum of all of them. Updates of the
+same worksheet are chained and run one after another in submission order.
+gspread clients and their HTTP sessions aren't thread-safe, so every
+worksheet gets its own client and only one call per client is ever in
+flight. The calls still go through the shared SheetsQuota, whose token
+buckets are thread-safe, so concurrency never exceeds the per-minute budget.
+"""
+
+
+class AsyncSheetsSink:
+    """
+    Schedules Sheets updates on the running event loop, keyed by worksheet.
+
+    Args:
+        client_factory: Callable returning a new authorized gspread client;
+            it is called once per worksheet.
+    """
+
+    def __init__(self, client_factory):
+        self._client_factory = client_factory
+        self._clients = {}
+        self._tails = {}
+        self._tasks = {}
+
+    def submit(self, worksheet, label, func, *args, **kwargs):
+        """
+        Queues func(client, *args, **kwargs) behind the updates already submitted for worksheet.
+
+        Args:
+            worksheet (str): Title of the worksheet the update writes to.
+            label (str): Name the outcome is reported under by drain().
+            func: Blocking function doing the update, called with the
+                worksheet's own client as its first argument.
+
+        Returns:
+            asyncio.Task: The scheduled update.
+        """
+        if label in self._tasks:
+            raise ValueError(f"Duplicate update label: {label}")
+        client = self._clients.get(worksheet)
+        if client is None:
+            client = self._clients[worksheet] = self._client_factory()
+        task = asyncio.create_task(self._run(self._tails.get(worksheet), func, (client,) + args, kwargs))
+        self._tails[worksheet] = task
+        self._tasks[label] = task
+        return task
+
+    @staticmethod
+    async def _run(previous, func, args, kwargs):
+        if previous is not None:
+            # Keep the worksheet's order even if the previous update failed
+            await asyncio.gather(previous, return_exceptions=True)
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def drain(self):
+        """
+        Waits for every submitted update.
+
+        Returns:
+            dict: label -> the update's return value, or the exception it raised.
+        """
+        labels = list(self._tasks)
+        outcomes = await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tails = {}
+        self._tasks = {}
+        return dict(zip(labels, outcomes))
@@ -0,0 +1,118 @@
+import argparse
+import os
+import random
+from xml.sax.saxutils import escape, quoteattr
+
+"""
+Generates synthetic Firebase Test Lab FullJUnitReport.xml files.
+
+The reports follow the shape Test Lab emits: a <testsuites> root with one
+<testsuite> per device, plain passing <testcase> elements, flaky cases marked
+flaky="true" with a single <failure>, and failed cases carrying one <failure>
+per attempt.
+"""
+
+FAILURE_TEXT = escape(
+    "java.lang.AssertionError: expected:<true> but was:<false>\n"
+    "\tat org.junit.Assert.fail(Assert.java:89)\n"
+    "\tat org.mozilla.fenix.helpers.TestHelper.waitForObjects(TestHelper.kt:105)\n"
+)
+
+
+def write_report(path, suites=2, cases=200, flaky_ratio=0.05, failure_ratio=0.02, classes=40, attempts=2,
+                 test_pool=None, first_test=0, rng=None):
+    """
+    Writes one synthetic report.
+
+    Args:
+        path (str): Output file path.
+        suites (int): Number of <testsuite> elements (devices).
+        cases (int): Testcases per suite.
+        flaky_ratio (float): Share of testcases marked flaky="true".
+        failure_ratio (float): Share of testcases failing every attempt.
+        classes (int): Number of distinct test classes the cases are spread over.
+        attempts (int): Failure elements written for a failed testcase.
+        test_pool (int): Number of distinct tests the cases are drawn from
+            (default: cases, i.e. every suite runs the same tests).
+        first_test (int): Index in the pool of this report's first test, so
+            consecutive reports can run different shards of the pool.
+        rng (random.Random): Random source, for reproducible output.
+
+    Returns:
+        int: Number of testcases written.
+    """
+    rng = rng or random.Random()
+    test_pool = test_pool or cases
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<testsuites>\n')
+        for s in range(suites):
+            f.write(
+                f'  <testsuite name="MediumPhone.arm-34-en_US-portrait-{s}" tests="{cases}" failures="0" '
+                f'flakes="0" errors="0" skipped="0" time="{cases * 12.5:.3f}" '
+                f'timestamp="2024-09-25T10:15:30" hostname="localhost">\n'
+            )
+            for c in range(cases):
+                test = (first_test + c) % test_pool
+                classname = quoteattr(f"org.mozilla.fenix.ui.Synthetic{test % classes}Test")
+                name = quoteattr(f"verifyScenario{test}Test")
+                roll = rng.random()
+                if roll < flaky_ratio:
+                    f.write(
+                        f'    <testcase name={name} classname={classname} time="14.2" flaky="true">\n'
+                        f"      <failure>{FAILURE_TEXT}</failure>\n"
+                        f"    </testcase>\n"
+                    )
+                elif roll < flaky_ratio + failure_ratio:
+                    failures = "".join(f"      <failure>{FAILURE_TEXT}</failure>\n" for _ in range(attempts))
+                    f.write(f'    <testcase name={name} classname={classname} time="30.1">\n{failures}    </testcase>\n')
+                else:
+                    f.write(f'    <testcase name={name} classname={classname} time="12.5"/>\n')
+            f.write("  </testsuite>\n")
+        f.write("</testsuites>\n")
+    return suites * cases
+
+
+def generate_reports(directory, reports=20, seed=0, **kwargs):
+    """
+    Writes `reports` synthetic reports into a directory.
+
+    Extra keyword arguments are passed to write_report. When a test_pool larger
+    than the per-suite case count is given, each report runs the next shard of
+    the pool, the way Test Lab spreads a suite over shards.
+
+    Returns:
+        int: Total number of testcases written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    total = 0
+    for i in range(reports):
+        path = os.path.join(directory, f"FullJUnitReport-2024-09-25_run{i:05d}.xml")
+        total += write_report(path, first_test=i * kwargs.get("cases", 200), rng=rng, **kwargs)
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic Firebase Test Lab JUnit reports.")
+    parser.add_argument("directory", help="Directory to write the reports to")
+    parser.add_argument("--reports", type=int, default=20, help="Number of report files (default: 20)")
+    parser.add_argument("--suites", type=int, default=2, help="Suites per report (default: 2)")
+    parser.add_argument("--cases", type=int, default=200, help="Testcases per suite (default: 200)")
+    parser.add_argument("--test-pool", type=int, help="Distinct tests to shard over (default: --cases)")
+    parser.add_argument("--flaky-ratio", type=float, default=0.05, help="Share of flaky testcases (default: 0.05)")
+    parser.add_argument("--failure-ratio", type=float, default=0.02, help="Share of failed testcases (default: 0.02)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+
+    args = parser.parse_args()
+
+    total = generate_reports(
+        args.directory,
+        reports=args.reports,
+        seed=args.seed,
+        suites=args.suites,
+        cases=args.cases,
+        test_pool=args.test_pool,
+        flaky_ratio=args.flaky_ratio,
+        failure_ratio=args.failure_ratio,
+    )
+    print(f"Wrote {args.reports} reports ({total} testcases) to {args.directory}")
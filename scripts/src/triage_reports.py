@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+
+import argparse
+import datetime
+import json
+import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+from adjust_timestamps import adjust_timestamps_in_xml_file
+
+"""
+Triages a directory of JUnit reports in a single streaming pass per file.
+
+Each report is read once with iterparse into a summary: whether it is empty,
+whether it has failures or errors, its suite and case counts and the range of
+its timestamps. The policies of inspect_reports.py (remove empty reports),
+preserve_failures.py (keep only failing reports) and adjust_timestamps.py
+(normalize timestamps) are then applied to that summary. Files are triaged in
+parallel across processes.
+"""
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def summarize_report(xml_file):
+    """
+    Streams a JUnit report once and summarizes it.
+
+    Returns:
+        dict: file, parsed, empty, has_failures, suites, cases,
+        first_timestamp and last_timestamp.
+    """
+    summary = {
+        "file": xml_file,
+        "parsed": True,
+        "empty": True,
+        "has_failures": False,
+        "suites": 0,
+        "cases": 0,
+        "first_timestamp": None,
+        "last_timestamp": None,
+    }
+    root_tag = None
+    parents = []
+    try:
+        for event, elem in ET.iterparse(xml_file, events=("start", "end")):
+            if event == "start":
+                if root_tag is None:
+                    root_tag = elem.tag
+                timestamp = elem.get("timestamp")
+                if timestamp:
+                    if summary["first_timestamp"] is None or timestamp < summary["first_timestamp"]:
+                        summary["first_timestamp"] = timestamp
+                    if summary["last_timestamp"] is None or timestamp > summary["last_timestamp"]:
+                        summary["last_timestamp"] = timestamp
+                parents.append(elem.tag)
+                continue
+
+            parents.pop()
+            # Suites are the root <testsuite> or the <testsuite> children of <testsuites>
+            is_suite = elem.tag == "testsuite" and (
+                not parents or (len(parents) == 1 and root_tag == "testsuites")
+            )
+            if is_suite:
+                summary["suites"] += 1
+                if _to_int(elem.get("failures")) > 0 or _to_int(elem.get("errors")) > 0:
+                    summary["has_failures"] = True
+                elem.clear()
+            elif elem.tag == "testcase" and parents and parents[-1] == "testsuite" and (
+                len(parents) == 1 or (len(parents) == 2 and root_tag == "testsuites")
+            ):
+                summary["cases"] += 1
+                if elem.find("failure") is not None or elem.find("error") is not None:
+                    summary["has_failures"] = True
+                elem.clear()
+    except ET.ParseError as e:
+        print(f"Warning: Could not parse {xml_file}: {e}")
+        summary["parsed"] = False
+        summary["empty"] = False
+        return summary
+
+    # Like junitparser, a lone root <testsuite> counts as one suite even without cases
+    summary["empty"] = root_tag == "testsuites" and summary["suites"] == 0
+    return summary
+
+
+def triage_report(xml_file, remove_empty=False, keep_failing=False, normalize_timestamps=False, base_time=None):
+    """
+    Summarizes one report and applies the selected policies to it.
+
+    Args:
+        xml_file (str): Report to triage.
+        remove_empty (bool): Delete the report if it has no suites.
+        keep_failing (bool): Delete the report unless it has a failure or error.
+            Unparsable reports are deleted too, as preserve_failures.py does.
+        normalize_timestamps (bool): Raise timestamps of kept reports to base_time.
+        base_time (datetime.datetime): Naive UTC time to normalize to.
+
+    Returns:
+        dict: The report summary, with the action taken.
+    """
+    summary = summarize_report(xml_file)
+    summary["action"] = "kept"
+
+    if remove_empty and summary["empty"]:
+        os.remove(xml_file)
+        summary["action"] = "removed-empty"
+        print(f"Removing empty report: {xml_file}")
+    elif keep_failing and not summary["has_failures"]:
+        os.remove(xml_file)
+        summary["action"] = "removed-passing"
+        print(f"Deleted file without failures: {xml_file}")
+    elif normalize_timestamps and summary["parsed"]:
+        # summarize_report already parsed the file
+        if adjust_timestamps_in_xml_file(xml_file, base_time, check=False):
+            summary["action"] = "normalized"
+    return summary
+
+
+def _triage_job(job):
+    return triage_report(*job)
+
+
+def find_reports(directory):
+    reports = []
+    for root_dir, _, files in os.walk(directory):
+        for file in sorted(files):
+            if file.endswith(".xml"):
+                reports.append(os.path.join(root_dir, file))
+    return reports
+
+
+def triage_reports(directory, remove_empty=False, keep_failing=False, normalize_timestamps=False, workers=1):
+    """
+    Triages every .xml report under a directory.
+
+    Returns:
+        list: Per-file summaries, in directory walk order.
+    """
+    base_time = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    jobs = [
+        (xml_file, remove_empty, keep_failing, normalize_timestamps, base_time)
+        for xml_file in find_reports(directory)
+    ]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            return list(executor.map(_triage_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    return [_triage_job(job) for job in jobs]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize JUnit reports in one pass and apply triage policies.")
+    parser.add_argument("directory", help="Directory containing JUnit XML reports")
+    parser.add_argument("--remove-empty", action="store_true", help="Delete reports without test suites")
+    parser.add_argument("--keep-failing", action="store_true", help="Delete reports without failures or errors")
+    parser.add_argument("--normalize-timestamps", action="store_true", help="Raise timestamps to the current UTC time")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parallel processes")
+    parser.add_argument("--summary-json", help="Write the per-file summaries to this file")
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        print(f"Error: Directory '{args.directory}' does not exist.")
+        exit(1)
+
+    summaries = triage_reports(
+        args.directory,
+        remove_empty=args.remove_empty,
+        keep_failing=args.keep_failing,
+        normalize_timestamps=args.normalize_timestamps,
+        workers=args.workers,
+    )
+
+    for summary in summaries:
+        print(
+            f"{summary['file']}: {summary['suites']} suites, {summary['cases']} cases, "
+            f"{'failures' if summary['has_failures'] else 'no failures'}, "
+            f"timestamps {summary['first_timestamp']} .. {summary['last_timestamp']} -> {summary['action']}"
+        )
+
+    actions = {}
+    for summary in summaries:
+        actions[summary["action"]] = actions.get(summary["action"], 0) + 1
+    print(f"Triaged {len(summaries)} reports: " + ", ".join(f"{n} {action}" for action, n in sorted(actions.items())))
+
+    if args.summary_json:
+        with open(args.summary_json, "w", encoding="utf-8") as f:
+            json.dump(summaries, f, indent=1)
@@ -0,0 +1,47 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from ingest_spreadsheet import aggregate_test_results, calculate_overall_totals, calculate_rates
+from synthetic_reports import generate_reports
+
+
+def table_state(test_data):
+    return list(test_data.rows())
+
+
+def totals_state(test_data):
+    totals = calculate_overall_totals(calculate_rates(test_data))
+    return totals.total_runs, totals.flaky_runs, totals.failed_runs
+
+
+@pytest.fixture
+def report_dir(tmp_path):
+    generate_reports(str(tmp_path), reports=12, suites=2, cases=50, test_pool=300, flaky_ratio=0.1, failure_ratio=0.05)
+    (tmp_path / "FullJUnitReport-empty.xml").write_text("<testsuites/>")
+    return tmp_path
+
+
+def test_parallel_matches_serial(report_dir):
+    serial = aggregate_test_results(str(report_dir), workers=1)
+    parallel = aggregate_test_results(str(report_dir), workers=4)
+
+    assert len(serial) == 300
+    assert table_state(parallel) == table_state(serial)
+    assert totals_state(parallel) == totals_state(serial)
+    assert totals_state(serial)[0] == 12 * 2 * 50
+
+
+def test_empty_report_adds_nothing(tmp_path):
+    (tmp_path / "FullJUnitReport-empty.xml").write_text("<testsuites/>")
+
+    for workers in (1, 4):
+        assert len(aggregate_test_results(str(tmp_path), workers=workers)) == 0
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_malformed_report_fails_on_both_paths(report_dir, workers):
+    (report_dir / "FullJUnitReport-truncated.xml").write_text('<testsuites><testsuite name="s"><testcase')
+
+    with pytest.raises(ET.ParseError):
+        aggregate_test_results(str(report_dir), workers=workers)
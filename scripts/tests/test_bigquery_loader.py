@@ -0,0 +1,98 @@
+import pytest
+
+import bigquery_loader
+import records
+
+
+class StubJob:
+    def result(self):
+        return None
+
+
+class StubClient:
+    """
+    Stands in for bigquery.Client, recording loads and queries.
+    """
+
+    def __init__(self):
+        self.loads = []
+        self.queries = []
+
+    def load_table_from_json(self, rows, destination, job_config=None):
+        self.loads.append({"rows": list(rows), "destination": destination, "config": job_config})
+        return StubJob()
+
+    def query(self, script, job_config=None):
+        self.queries.append({"script": script, "config": job_config})
+        return StubJob()
+
+
+def test_daily_totals_are_loaded_and_merged_with_the_dates():
+    client = StubClient()
+    totals = records.DailyTotals("2024-05-01", 200, 10, 5)
+
+    loaded = bigquery_loader.load_daily_totals(
+        client, totals, "testops_stats._staging_fenix_daily", "testops_stats.fenix_daily"
+    )
+
+    assert loaded == 1
+    [load] = client.loads
+    assert load["destination"] == "testops_stats._staging_fenix_daily"
+    assert load["rows"] == [{
+        "Date": "2024-05-01", "Total Runs": 200, "Flaky Runs": 10, "Failed Runs": 5,
+        "Flaky Rate": 0.05, "Failure Rate": 0.025,
+    }]
+    assert load["config"].write_disposition == "WRITE_TRUNCATE"
+
+    [query] = client.queries
+    [parameter] = query["config"].query_parameters
+    assert parameter.name == "dates"
+    assert [str(value) for value in parameter.values] == ["2024-05-01"]
+
+    script = query["script"]
+    staging_guard = script.index("FROM `testops_stats._staging_fenix_daily`\n  GROUP BY `Date`")
+    merge = script.index("MERGE `testops_stats.fenix_daily` T")
+    prod_guard = script.index("WHERE Date IN UNNEST(@dates)")
+    assert staging_guard < merge < prod_guard
+
+
+def test_test_results_merge_on_the_full_key():
+    client = StubClient()
+    results = [records.TestResult("org.mozilla.HomeTest", "verifyHome", 4, 1, 0)]
+
+    bigquery_loader.load_test_results(
+        client, results, "2024-05-01", "Fenix", "proj.ds._staging_tests", "proj.ds.tests"
+    )
+
+    script = client.queries[0]["script"]
+    assert "ON T.`Date` = S.`Date` AND T.`Project` = S.`Project` AND T.`Class Name` = S.`Class Name`" in script
+    assert "GROUP BY `Date`, `Project`, `Class Name`, `Test Name`" in script
+    assert client.loads[0]["rows"][0]["Flaky Rate"] == 0.25
+
+
+@pytest.mark.parametrize("staging, prod", [
+    ("ds._staging_daily`; DROP TABLE x; --", "ds.daily"),
+    ("ds._staging_daily", "daily"),
+    ("ds._staging_daily", "a.b.c.d"),
+])
+def test_invalid_table_ids_are_rejected(staging, prod):
+    client = StubClient()
+
+    with pytest.raises(ValueError, match="Invalid BigQuery table id"):
+        bigquery_loader.load_daily_totals(client, records.DailyTotals("2024-05-01", 1), staging, prod)
+    assert client.loads == [] and client.queries == []
+
+
+def test_refuses_to_replace_a_non_staging_table():
+    client = StubClient()
+
+    with pytest.raises(ValueError, match="non-staging"):
+        bigquery_loader.load_daily_totals(client, records.DailyTotals("2024-05-01", 1), "ds.daily", "ds.daily")
+    assert client.loads == []
+
+
+def test_no_rows_loads_nothing():
+    client = StubClient()
+
+    assert bigquery_loader.load_test_results(client, [], "2024-05-01", "Fenix", "ds._staging_t", "ds.t") == 0
+    assert client.loads == [] and client.queries == []
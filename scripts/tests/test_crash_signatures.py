@@ -0,0 +1,60 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from crash_signatures import crash_signature, normalize_function
+
+SCRIPT = os.path.join(os.path.dirname(__file__), "..", "src", "crash_signatures.py")
+
+
+@pytest.mark.parametrize(
+    "function, expected",
+    [
+        ("mozilla::(anonymous namespace)::RunWatchdog(void*)", "mozilla::(anonymous namespace)::RunWatchdog"),
+        ("(anonymous namespace)::Foo::Bar(int)", "(anonymous namespace)::Foo::Bar"),
+        ("(anonymous namespace)::Other(char)", "(anonymous namespace)::Other"),
+        ("Foo::operator()(int) const", "Foo::operator()"),
+        ("Foo::operator()", "Foo::operator()"),
+        ("libc.so + 0x1234", "libc.so + 0x1234"),
+        ("mozilla::Foo::Run() const noexcept", "mozilla::Foo::Run"),
+        ("std::vector<std::pair<int, int> >::push_back(int const&) &&", "std::vector::push_back"),
+        ("nsThread::ProcessNextEvent(bool, bool*) 0xdeadbeef", "nsThread::ProcessNextEvent"),
+        (None, ""),
+    ],
+)
+def test_normalize_function(function, expected):
+    assert normalize_function(function) == expected
+
+
+def test_anonymous_namespace_functions_get_distinct_signatures():
+    def crash(function):
+        return {"crashing_thread": {"frames": [{"module": "libxul.so", "function": function}]}}
+
+    first = crash_signature(crash("(anonymous namespace)::Foo::Bar(int)"))
+    second = crash_signature(crash("(anonymous namespace)::Other(char)"))
+    assert first != second
+    assert first[1] == "libxul.so!(anonymous namespace)::Foo::Bar"
+
+
+def test_index_output_leaves_the_index_untouched(tmp_path):
+    reports = tmp_path / "reports"
+    reports.mkdir()
+    (reports / "dump1.json").write_text(json.dumps(
+        {"crashing_thread": {"frames": [{"module": "libxul.so", "function": "mozilla::Run(int)"}]}}
+    ))
+    index = tmp_path / "index.json"
+    index.write_text("{}")
+    pending = tmp_path / "index.pending.json"
+
+    env = {key: value for key, value in os.environ.items() if key not in ("GITHUB_OUTPUT", "GITHUB_STEP_SUMMARY")}
+    subprocess.run(
+        [sys.executable, SCRIPT, str(reports), "--index", str(index), "--index-output", str(pending)],
+        check=True, capture_output=True, env=env,
+    )
+
+    assert json.loads(index.read_text()) == {}
+    [entry] = json.loads(pending.read_text()).values()
+    assert entry["signature"] == "libxul.so!mozilla::Run"
@@ -0,0 +1,102 @@
+import json
+import os
+
+import fetch_junit_reports
+from fetch_junit_reports import fetch_junit_reports as fetch
+
+
+class FakeBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+
+    def download_as_bytes(self):
+        return self.bucket.download(self.name)
+
+    def download_to_filename(self, filename):
+        content = self.bucket.download(self.name)
+        with open(filename, "wb") as f:
+            f.write(content)
+
+
+class FakeBucket:
+    def __init__(self, name, objects, failing):
+        self.name = name
+        self.objects = objects
+        self.failing = failing
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+    def download(self, name):
+        if name in self.failing:
+            raise ConnectionError(f"download of {name} failed")
+        return self.objects[name]
+
+
+class FakeStorageClient:
+    """
+    Minimal storage.Client: list_blobs honours prefix and the brace match_glob.
+    """
+
+    def __init__(self, objects, failing=()):
+        self.objects = objects
+        self.failing = set(failing)
+        self.list_calls = []
+
+    def bucket(self, name):
+        return FakeBucket(name, self.objects, self.failing)
+
+    def list_blobs(self, bucket_name, prefix=None, match_glob=None, fields=None):
+        self.list_calls.append({"prefix": prefix, "match_glob": match_glob})
+        wanted = match_glob[len("*/{"):-1].split(",")
+        return [
+            FakeBlob(None, name)
+            for name in sorted(self.objects)
+            if name.startswith(prefix) and name.count("/") == 1 and name.split("/")[1] in wanted
+        ]
+
+
+def matrix(label):
+    return json.dumps({"matrix-1": {"clientDetails": {"matrixLabel": label}}}).encode()
+
+
+OBJECTS = {
+    "2024-05-01_main/FullJUnitReport.xml": b"<testsuites/>",
+    "2024-05-01_main/matrix_ids.json": matrix("main"),
+    "2024-05-01_main/artifacts/logcat": b"ignored",
+    "2024-05-01_try/FullJUnitReport.xml": b"<testsuites/>",
+    "2024-05-01_try/matrix_ids.json": matrix("try"),
+    "2024-05-01_nomatrix/FullJUnitReport.xml": b"<testsuites/>",
+    "2024-05-02_other/FullJUnitReport.xml": b"<testsuites/>",
+}
+
+
+def test_fetches_non_try_reports(tmp_path):
+    client = FakeStorageClient(OBJECTS)
+
+    reports, failed = fetch("bucket", "2024-05-01", str(tmp_path), workers=4, client=client)
+
+    assert failed == []
+    assert sorted(os.path.basename(path) for path in reports) == [
+        "FullJUnitReport-2024-05-01_main.xml",
+        "FullJUnitReport-2024-05-01_nomatrix.xml",
+    ]
+    assert client.list_calls == [
+        {"prefix": "2024-05-01", "match_glob": "*/{FullJUnitReport.xml,matrix_ids.json}"}
+    ]
+
+
+def test_failed_runs_are_reported_and_others_fetched(tmp_path):
+    client = FakeStorageClient(OBJECTS, failing=["2024-05-01_main/FullJUnitReport.xml"])
+
+    reports, failed = fetch("bucket", "2024-05-01", str(tmp_path), workers=4, client=client)
+
+    assert failed == ["2024-05-01_main"]
+    assert [os.path.basename(path) for path in reports] == ["FullJUnitReport-2024-05-01_nomatrix.xml"]
+
+
+def test_is_try_run():
+    assert fetch_junit_reports.is_try_run(json.loads(matrix("try")))
+    assert not fetch_junit_reports.is_try_run(json.loads(matrix("main")))
+    assert not fetch_junit_reports.is_try_run([])
@@ -0,0 +1,152 @@
+import io
+import json
+import os
+import stat
+import sys
+import threading
+import time
+import zipfile
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from process_crash_reports import CACHE_MARKER, SymbolCache, process_crash_reports
+
+STUB_STACKWALKER = f"""#!{sys.executable}
+import json, sys
+args = sys.argv[1:]
+dmp_file, symbols_dir = args[0], args[1]
+with open(args[args.index("--cyborg") + 1], "w") as f:
+    json.dump({{"dump": dmp_file, "symbols": open(symbols_dir + "/libxul.sym").read()}}, f)
+with open(args[args.index("--output-file") + 1], "w") as f:
+    f.write("stub stack\\n")
+"""
+
+
+def symbols_zip(gecko_rev):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("libxul.sym", f"MODULE Linux arm64 {gecko_rev} libxul.so\n" + "x" * 1000)
+    return buffer.getvalue()
+
+
+class SymbolServer(ThreadingHTTPServer):
+    daemon_threads = True
+    block_on_close = False
+
+
+@pytest.fixture
+def server():
+    requests = Counter()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            _, label, rev = self.path.split("/")
+            requests[rev] += 1
+            if rev == "stalled":
+                time.sleep(2)
+            if rev == "missing":
+                self.send_error(404)
+                return
+            # Slow enough that concurrent requests for a build overlap
+            time.sleep(0.1)
+            data = symbols_zip(rev)
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    httpd = SymbolServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.requests = requests
+    httpd.url_template = f"http://127.0.0.1:{httpd.server_port}/{{matrix_label}}/{{gecko_rev}}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def stackwalker(tmp_path):
+    path = tmp_path / "stub-stackwalk"
+    path.write_text(STUB_STACKWALKER)
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+
+def make_run(input_dir, project, run, gecko_rev, dumps=2):
+    run_dir = input_dir / project / "crash_reports" / run
+    run_dir.mkdir(parents=True)
+    (run_dir / "matrix_ids.json").write_text(json.dumps(
+        {"matrix-1": {"clientDetails": {"matrixLabel": "mozilla-central", "geckoRev": gecko_rev}}}
+    ))
+    for i in range(dumps):
+        (run_dir / f"{run}-{i}.dmp").write_bytes(b"MDMP")
+
+
+def test_runs_sharing_a_build_fetch_its_symbols_once(tmp_path, server, stackwalker):
+    input_dir = tmp_path / "input"
+    for i in range(6):
+        make_run(input_dir, "fenix", f"run{i}", "rev-a" if i % 2 else "rev-b")
+    cache = SymbolCache(str(tmp_path / "cache"), 10 ** 9, server.url_template)
+
+    processed = process_crash_reports(str(input_dir), str(tmp_path / "out"), cache, stackwalker, workers=8)
+
+    assert processed == 12
+    assert server.requests == {"rev-a": 1, "rev-b": 1}
+    assert (cache.hits, cache.misses) == (0, 2)
+    with open(tmp_path / "out" / "run1-0.json") as f:
+        assert "rev-a" in json.load(f)["symbols"]
+
+
+def test_concurrent_gets_of_one_build_download_once(tmp_path, server):
+    cache = SymbolCache(str(tmp_path / "cache"), 10 ** 9, server.url_template)
+    paths = []
+    threads = [
+        threading.Thread(target=lambda: paths.append(cache.get("mozilla-central", "rev-a"))) for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert server.requests["rev-a"] == 1
+    assert len(set(paths)) == 1 and paths[0] is not None
+    assert (cache.hits, cache.misses) == (7, 1)
+
+
+def test_failed_and_stalled_downloads_are_skipped(tmp_path, server):
+    cache = SymbolCache(str(tmp_path / "cache"), 10 ** 9, server.url_template, timeout=0.3)
+
+    assert cache.get("mozilla-central", "missing") is None
+    start = time.monotonic()
+    assert cache.get("mozilla-central", "stalled") is None
+    assert time.monotonic() - start < 1.5
+    assert not [name for name in os.listdir(cache.root) if name.startswith(".download-")]
+
+
+def test_evicts_least_recently_used_entries(tmp_path, server):
+    root = str(tmp_path / "cache")
+    warm = SymbolCache(root, 10 ** 9, server.url_template)
+    for age, rev in enumerate(["rev-new", "rev-mid", "rev-old"]):
+        path = warm.get("mozilla-central", rev)
+        marker = os.path.join(path, CACHE_MARKER)
+        os.utime(marker, (time.time() - 100 * age, time.time() - 100 * age))
+    with open(os.path.join(path, CACHE_MARKER)) as f:
+        entry_bytes = json.load(f)["bytes"]
+
+    # Room for two entries; rev-old is the oldest but in use this run
+    cache = SymbolCache(root, 2 * entry_bytes, server.url_template)
+    cache.get("mozilla-central", "rev-old")
+    freed = cache.evict()
+
+    remaining = set()
+    for name in os.listdir(root):
+        with open(os.path.join(root, name, CACHE_MARKER)) as f:
+            remaining.add(json.load(f)["geckoRev"])
+    assert freed == entry_bytes
+    assert remaining == {"rev-new", "rev-old"}
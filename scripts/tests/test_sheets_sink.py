@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+import pytest
+
+import ingest_spreadsheet
+from fake_sheets import FakeClient
+import records
+from sheets_quota import SheetsQuota
+from sheets_sink import AsyncSheetsSink
+
+SPREADSHEET_TITLE = ingest_spreadsheet.SPREADSHEET_TITLE
+LATENCY = 0.05
+
+
+@pytest.fixture(autouse=True)
+def unthrottled(monkeypatch):
+    monkeypatch.setattr(ingest_spreadsheet, "SHEETS_QUOTA", SheetsQuota(10 ** 9, 10 ** 9))
+
+
+def fake_client():
+    client = FakeClient(LATENCY)
+    client.spreadsheet(SPREADSHEET_TITLE).add_worksheet(ingest_spreadsheet.DAILY_TOTALS_SHEET, rows=1000, cols=7)
+    return client
+
+
+def sheet_contents(client):
+    return {
+        title: ws.get_all_values()
+        for title, ws in client.spreadsheet(SPREADSHEET_TITLE)._worksheets.items()
+    }
+
+
+def project():
+    results = [
+        records.TestResult("org.mozilla.fenix.ui.HomeTest", f"verify{i}", 10, i % 3, i % 2) for i in range(20)
+    ]
+    return {
+        "project_name": "Fenix",
+        "aggregated_results": results,
+        "new_results": results,
+        "daily_totals": records.DailyTotals.from_results(results, "2024-05-01"),
+    }
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def test_concurrent_updates_take_about_the_slowest_update():
+    data = project()
+    run_date = "2024-05-01"
+    updates = [
+        lambda c: ingest_spreadsheet.append_daily_per_test_issues_only(c, data["aggregated_results"], "Fenix", run_date),
+        lambda c: ingest_spreadsheet.update_google_sheet_with_cumulative_data(c, data["new_results"], "Fenix"),
+        lambda c: ingest_spreadsheet.update_daily_totals_sheet(
+            c, data["daily_totals"], ingest_spreadsheet.DAILY_TOTALS_SHEET, "Fenix"
+        ),
+    ]
+    slowest = max(timed(lambda: update(fake_client()))[1] for update in updates)
+
+    sequential_client = fake_client()
+    _, sequential = timed(lambda: [update(sequential_client) for update in updates])
+
+    concurrent_client = fake_client()
+    clients = []
+
+    def factory():
+        clients.append(concurrent_client)
+        return concurrent_client
+
+    outcomes, concurrent = timed(
+        lambda: asyncio.run(ingest_spreadsheet.update_project_sheets(factory, data, run_date))
+    )
+
+    assert not any(isinstance(outcome, Exception) for outcome in outcomes.values())
+    assert len(clients) == 3
+    assert sheet_contents(concurrent_client) == sheet_contents(sequential_client)
+    assert concurrent < slowest + 2 * LATENCY
+    assert concurrent < sequential * 0.6
+
+
+def test_updates_of_one_worksheet_keep_their_order():
+    log = []
+    clients_used = {}
+
+    def update(client, worksheet, name, seconds, fail=False):
+        clients_used.setdefault(worksheet, set()).add(client)
+        time.sleep(seconds)
+        log.append(name)
+        if fail:
+            raise RuntimeError(name)
+        return name
+
+    async def run():
+        sink = AsyncSheetsSink(object)
+        sink.submit("A", "a1", update, "A", "a1", 0.2, fail=True)
+        sink.submit("A", "a2", update, "A", "a2", 0.01)
+        sink.submit("B", "b1", update, "B", "b1", 0.05)
+        return await sink.drain()
+
+    outcomes = asyncio.run(run())
+
+    assert isinstance(outcomes["a1"], RuntimeError)
+    assert outcomes["a2"] == "a2"
+    assert outcomes["b1"] == "b1"
+    assert log == ["b1", "a1", "a2"]
+    # Each worksheet gets one client of its own
+    assert len(clients_used["A"]) == 1 and len(clients_used["B"]) == 1
+    assert clients_used["A"] != clients_used["B"]
+
+
+def test_duplicate_labels_are_rejected():
+    async def run():
+        sink = AsyncSheetsSink(object)
+        sink.submit("A", "a", lambda client: None)
+        with pytest.raises(ValueError):
+            sink.submit("B", "a", lambda client: None)
+        await sink.drain()
+
+    asyncio.run(run())
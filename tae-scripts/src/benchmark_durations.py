@@ -0,0 +1,74 @@
+import argparse
+import random
+import time
+
+from durations import match_tests
+
+"""
+Benchmarks test-name matching in durations.generate_summary.
+
+A synthetic Allure history with Fenix-style test keys is generated, and the
+test list mixes exact names, class or method fragments and names with no
+history. The indexed matcher is timed against the original nested loop and
+both must return the same keys in the same order.
+"""
+
+
+def naive_match_tests(test_names, history):
+    return [key for name in test_names for key in history if key == name or name in key]
+
+
+def synthetic_history(keys, rng):
+    history = {}
+    while len(history) < keys:
+        cls = f"org.mozilla.fenix.ui.Synthetic{rng.randrange(keys // 20 or 1)}Test"
+        history[f"{cls}#verifyScenario{rng.randrange(keys)}Test"] = {"items": []}
+    return history
+
+
+def synthetic_test_list(history, tests, rng):
+    keys = list(history)
+    names = []
+    for _ in range(tests):
+        key = rng.choice(keys)
+        roll = rng.random()
+        if roll < 0.5:
+            names.append(key)
+        elif roll < 0.8:
+            names.append(key.split("#")[1])
+        elif roll < 0.9:
+            names.append(key.split("#")[0].rsplit(".", 1)[1])
+        else:
+            names.append(f"verifyMissing{rng.randrange(tests)}Test")
+    return names
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark history key matching in durations.py.")
+    parser.add_argument("--keys", type=int, default=50000, help="History keys (default: 50000)")
+    parser.add_argument("--tests", type=int, default=500, help="Names in the test list (default: 500)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--skip-naive", action="store_true", help="Only time the indexed matcher")
+
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    history = synthetic_history(args.keys, rng)
+    test_names = synthetic_test_list(history, args.tests, rng)
+
+    indexed, indexed_seconds = timed(match_tests, test_names, history)
+    print(f"Indexed: {len(indexed)} matches in {indexed_seconds:.3f}s")
+
+    if not args.skip_naive:
+        naive, naive_seconds = timed(naive_match_tests, test_names, history)
+        print(f"Naive:   {len(naive)} matches in {naive_seconds:.3f}s")
+        if naive != indexed:
+            print("Error: indexed matches differ from the nested loop.")
+            exit(1)
+        print(f"Identical output, {naive_seconds / indexed_seconds:.1f}x faster")
@@ -1,8 +1,14 @@
+import argparse
 import json
 import requests
 from datetime import datetime
 from datetime import UTC
-from statistics import mean
+
+from http_cache import HttpCache
+from json_stream import JsonScanner, decode_chunks, file_chunks
+from substring_index import SubstringIndex
+
+HISTORY_URL = "https://storage.googleapis.com/mobile-allure-test-reports/Fenix/allure-report/history/history.json"
 
 
 def load_test_names(json_path):
@@ -17,48 +23,156 @@ def fetch_history(url):
     return response.json()
 
 
+def history_chunks(url=None, path=None):
+    """
+    Yields history.json as text chunks, from a local file if given, else streamed over HTTP.
+    """
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            yield from file_chunks(f)
+        return
+    with requests.get(url, stream=True) as response:
+        response.raise_for_status()
+        yield from decode_chunks(response.iter_content(chunk_size=64 * 1024))
+
+
 def ts_to_date(ts_ms):
     return datetime.fromtimestamp(ts_ms / 1000, tz=UTC).strftime("%Y-%m-%d")
 
 
-def process_test(test_key, test_data):
-    durations = []
-    timestamps = []
+class DurationStats:
+    """
+    Running count, sum and start range of a test's durations.
+    """
 
-    for item in test_data.get("items", []):
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.first_start = None
+        self.last_start = None
+
+    def add(self, item):
         time = item.get("time", {})
         duration = time.get("duration")
         start = time.get("start")
-        if duration is not None and start is not None:
-            durations.append(duration)
-            timestamps.append(start)
-
-    if not durations:
-        return None
-
-    avg_sec = round(mean(durations) / 1000, 2)
-    min_date = ts_to_date(min(timestamps))
-    max_date = ts_to_date(max(timestamps))
-    return {
-        "test": test_key,
-        "average_duration_sec": avg_sec,
-        "count": len(durations),
-        "start_date": min_date,
-        "end_date": max_date,
-    }
-
-
-def generate_summary(json_path, history_url, output_csv_path):
+        if duration is None or start is None:
+            return
+        self.count += 1
+        self.total += duration
+        if self.first_start is None or start < self.first_start:
+            self.first_start = start
+        if self.last_start is None or start > self.last_start:
+            self.last_start = start
+
+    def summary(self, test_key):
+        if not self.count:
+            return None
+        return {
+            "test": test_key,
+            "average_duration_sec": round(self.total / self.count / 1000, 2),
+            "count": self.count,
+            "start_date": ts_to_date(self.first_start),
+            "end_date": ts_to_date(self.last_start),
+        }
+
+
+def process_test(test_key, test_data):
+    stats = DurationStats()
+    for item in test_data.get("items", []):
+        stats.add(item)
+    return stats.summary(test_key)
+
+
+def stream_test_summaries(chunks, test_names):
+    """
+    Summarizes the matched tests of a history.json read incrementally.
+
+    Only the items of tests whose key contains a test name are decoded, one
+    at a time; every other value is skipped without being built.
+
+    Args:
+        chunks (iterable): history.json as text chunks.
+        test_names (list): Names from test_list.json.
+
+    Returns:
+        dict: Matched history key -> summary (or None), in history order.
+    """
+    index = SubstringIndex(test_names)
+    scanner = JsonScanner(chunks)
+    summaries = {}
+    for key in scanner.iter_object():
+        if not index.find(key):
+            scanner.skip_value()
+            continue
+        stats = DurationStats()
+        for field in scanner.iter_object():
+            if field != "items":
+                scanner.skip_value()
+                continue
+            for _ in scanner.iter_array():
+                stats.add(scanner.read_value())
+        summaries[key] = stats.summary(key)
+    return summaries
+
+
+def match_tests(test_names, history):
+    """
+    Returns the history keys matching each test name, in test list order and
+    then history order, as `key == name or name in key` over every pair would.
+
+    Each history key is scanned once against an automaton of all test names.
+    """
+    matches = {name: [] for name in test_names}
+    index = SubstringIndex(matches)
+    for key in history:
+        for name in index.find(key):
+            matches[name].append(key)
+    return [key for name in test_names for key in matches[name]]
+
+
+def cached_test_summaries(cache, url, test_names, offline=False):
+    """
+    Summarizes a history.json kept in an HttpCache.
+
+    The body is only downloaded if the server reports a change, and when it
+    didn't change the summaries parsed last time for the same test list are
+    reused without reading it again.
+
+    Returns:
+        dict: Matched history key -> summary (or None), in history order.
+    """
+    path, not_modified = cache.fetch(url, offline=offline)
+    key = json.dumps(test_names)
+    summaries = cache.load_result(url, key) if not_modified else None
+    if summaries is not None:
+        print("Reusing the summaries parsed from the cached history")
+        return summaries
+
+    with open(path, "r", encoding="utf-8") as f:
+        summaries = stream_test_summaries(file_chunks(f), test_names)
+    cache.save_result(url, key, summaries)
+    return summaries
+
+
+def generate_summary(json_path, history_url, output_csv_path, history_file=None, stream=False, cache_dir=None,
+                     offline=False):
     test_names = load_test_names(json_path)
-    history = fetch_history(history_url)
 
-    results = []
-    for name in test_names:
-        for key in history:
-            if key == name or name in key:
-                summary = process_test(key, history[key])
-                if summary:
-                    results.append(summary)
+    if cache_dir and not history_file:
+        summaries = cached_test_summaries(HttpCache(cache_dir), history_url, test_names, offline)
+    elif stream:
+        summaries = stream_test_summaries(history_chunks(history_url, history_file), test_names)
+    else:
+        if history_file:
+            with open(history_file, "r", encoding="utf-8") as f:
+                history = json.load(f)
+        else:
+            history = fetch_history(history_url)
+        matched = set(match_tests(test_names, history))
+        summaries = {key: process_test(key, history[key]) for key in history if key in matched}
+
+    # Matching again over the matched keys alone restores the output order
+    results = [summaries[key] for key in match_tests(test_names, summaries) if summaries[key]]
 
     with open(output_csv_path, "w") as f:
         f.write("Test Name,Average Duration (s),N,Start Date,End Date\n")
@@ -71,8 +185,31 @@ def generate_summary(json_path, history_url, output_csv_path):
 
 
 if __name__ == "__main__":
-    generate_summary(
-        json_path="test_list.json",
-        history_url="https://storage.googleapis.com/mobile-allure-test-reports/Fenix/allure-report/history/history.json",
-        output_csv_path="test_summary.csv",
-    )
+    parser = argparse.ArgumentParser(description="Summarize test durations from the Allure history.")
+    parser.add_argument("--tests", default="test_list.json", help="Test list (default: test_list.json)")
+    parser.add_argument("--history-url", default=HISTORY_URL, help="Allure history.json URL")
+    parser.add_argument("--history-file", help="Read history.json from a local file instead")
+    parser.add_argument("--output", default="test_summary.csv", help="Output CSV (default: test_summary.csv)")
+    parser.add_argument("--stream", action="store_true", help="Parse history.json incrementally in constant memory")
+    parser.add_argument("--cache-dir", help="Cache history.json here and only download it when it changed")
+    parser.add_argument("--offline", action="store_true", help="Run from the --cache-dir cache without network access")
+
+    args = parser.parse_args()
+
+    if args.offline and not args.cache_dir:
+        print("Error: --offline needs --cache-dir.")
+        exit(1)
+
+    try:
+        generate_summary(
+            json_path=args.tests,
+            history_url=args.history_url,
+            output_csv_path=args.output,
+            history_file=args.history_file,
+            stream=args.stream,
+            cache_dir=args.cache_dir,
+            offline=args.offline,
+        )
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        exit(1)
@@ -0,0 +1,113 @@
+import glob
+import hashlib
+import json
+import os
+from datetime import datetime, UTC
+
+import requests
+
+"""
+Local cache for HTTP downloads, revalidated with ETag and Last-Modified.
+
+Each URL's body is stored on disk with the validators the server sent. Later
+fetches send If-None-Match / If-Modified-Since, and a 304 reuses the stored
+body. Results computed from a body can be stored next to it under a key and
+are dropped whenever the body changes. In offline mode only the cache is read.
+"""
+
+
+class HttpCache:
+    """
+    Args:
+        directory (str): Cache directory.
+        session (requests.Session): Session to fetch with (default: a new one).
+    """
+
+    def __init__(self, directory, session=None):
+        self.directory = directory
+        self.session = session or requests.Session()
+        os.makedirs(directory, exist_ok=True)
+
+    def _base(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+    def body_path(self, url):
+        return self._base(url) + ".body"
+
+    def _meta_path(self, url):
+        return self._base(url) + ".meta.json"
+
+    def _result_path(self, url, key):
+        return f"{self._base(url)}.result-{hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]}.json"
+
+    def load_meta(self, url):
+        path = self._meta_path(url)
+        if not os.path.isfile(path) or not os.path.isfile(self.body_path(url)):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_json(self, path, data):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def fetch(self, url, offline=False, timeout=60):
+        """
+        Returns the cached body of a URL, downloading it only if it changed.
+
+        Returns:
+            tuple: (path of the body on disk, True if the cached body was reused).
+
+        Raises:
+            FileNotFoundError: In offline mode, if the URL was never cached.
+        """
+        meta = self.load_meta(url)
+        if offline:
+            if meta is None:
+                raise FileNotFoundError(f"{url} is not in the cache at {self.directory}")
+            print(f"Offline: using cached {url} from {meta['fetched_at']}")
+            return self.body_path(url), True
+
+        headers = {}
+        if meta and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta and meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+        with self.session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+            if response.status_code == 304 and meta is not None:
+                print(f"{url} not modified since {meta['fetched_at']}, using cache")
+                return self.body_path(url), True
+            response.raise_for_status()
+
+            tmp_path = self.body_path(url) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    f.write(chunk)
+            # Results computed from the old body no longer apply
+            for result in glob.glob(self._base(url) + ".result-*.json"):
+                os.remove(result)
+            os.replace(tmp_path, self.body_path(url))
+            self._write_json(self._meta_path(url), {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched_at": datetime.now(UTC).isoformat(timespec="seconds"),
+            })
+        print(f"Downloaded {url} to the cache")
+        return self.body_path(url), False
+
+    def load_result(self, url, key):
+        """
+        Returns a result stored for the current body under key, or None.
+        """
+        path = self._result_path(url, key)
+        if not os.path.isfile(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_result(self, url, key, result):
+        self._write_json(self._result_path(url, key), result)
@@ -2,6 +2,13 @@ import csv
 import gspread
 import json
 import os
+import sys
+
+# Share the Sheets quota scheduler with the ingest scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "scripts", "src"))
+from sheets_quota import SheetsQuota  # noqa: E402
+
+SHEETS_QUOTA = SheetsQuota.from_env()
 
 
 def authenticate_google_sheets():
@@ -36,19 +43,19 @@ def upload_csv_to_worksheet(csv_filename, sheet_title, spreadsheet_title):
     """
     client = authenticate_google_sheets()
 
+    spreadsheet = SHEETS_QUOTA.read(client.open, spreadsheet_title)
     try:
-        sheet = client.open(spreadsheet_title).worksheet(sheet_title)
+        sheet = SHEETS_QUOTA.read(spreadsheet.worksheet, sheet_title)
     except gspread.exceptions.WorksheetNotFound:
-        sheet = client.open(spreadsheet_title).add_worksheet(title=sheet_title, rows="1000", cols="25")
+        sheet = SHEETS_QUOTA.write(spreadsheet.add_worksheet, title=sheet_title, rows="1000", cols="25")
 
-    
     # Read and upload CSV content
     with open(csv_filename, 'r', newline='') as f:
         reader = csv.reader(f)
         rows = list(reader)
 
     # Update the worksheet with new data
-    sheet.update('A1', rows)
+    SHEETS_QUOTA.write(sheet.update, 'A1', rows)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,203 @@
+import codecs
+import json
+import re
+
+"""
+Incremental JSON scanner over a stream of text chunks (stdlib only).
+
+The scanner walks objects and arrays one member at a time. Values the caller
+wants are decoded with json's raw_decode once they are complete in the buffer;
+values it doesn't want are skipped by scanning for brackets and string ends,
+without building any Python objects. Consumed text is dropped from the buffer
+as new chunks arrive, so memory is bounded by the largest value decoded.
+"""
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRUCTURE = re.compile(r'["{}\[\]]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR = re.compile(r"[^,:\]}\s]*")
+_DECODER = json.JSONDecoder()
+
+
+def decode_chunks(byte_chunks, encoding="utf-8"):
+    """
+    Decodes an iterable of byte chunks (e.g. an HTTP body) into text chunks.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for chunk in byte_chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+def file_chunks(f, chunk_size=CHUNK_SIZE):
+    """
+    Reads a text file object in chunks.
+    """
+    return iter(lambda: f.read(chunk_size), "")
+
+
+class JsonScanner:
+    """
+    Pull scanner over JSON text.
+
+    Args:
+        chunks (iterable): Text chunks making up one JSON document.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = ""
+        self._pos = 0
+        self._mark = None
+
+    def _fill(self):
+        """
+        Appends the next chunk, dropping text before the position (or the mark).
+
+        Returns:
+            bool: False at the end of the input.
+        """
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+        keep = self._pos if self._mark is None else self._mark
+        self._buffer = self._buffer[keep:] + chunk
+        self._pos -= keep
+        if self._mark is not None:
+            self._mark = 0
+        return True
+
+    def _need(self, count=1):
+        while len(self._buffer) - self._pos < count:
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON input")
+
+    def peek(self):
+        """
+        Skips whitespace and returns the next character ("" at the end of the input).
+        """
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def consume(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found!r}")
+        self._pos += 1
+
+    def _scan_string(self):
+        self._pos += 1
+        while True:
+            match = _STRING_SPECIAL.search(self._buffer, self._pos)
+            if match is None:
+                self._pos = len(self._buffer)
+                self._need()
+                continue
+            if match.group() == '"':
+                self._pos = match.end()
+                return
+            # Skip the escaped character, which may be in the next chunk
+            self._pos = match.start()
+            self._need(2)
+            self._pos += 2
+
+    def _scan_value(self):
+        char = self.peek()
+        if char == '"':
+            self._scan_string()
+        elif char in ("{", "["):
+            self._pos += 1
+            depth = 1
+            while depth:
+                match = _STRUCTURE.search(self._buffer, self._pos)
+                if match is None:
+                    self._pos = len(self._buffer)
+                    self._need()
+                    continue
+                self._pos = match.start()
+                if match.group() == '"':
+                    self._scan_string()
+                    continue
+                depth += 1 if match.group() in "{[" else -1
+                self._pos += 1
+        elif char:
+            # Numbers, true, false and null: read on until a delimiter
+            while True:
+                end = _SCALAR.match(self._buffer, self._pos).end()
+                if end < len(self._buffer) or not self._fill():
+                    break
+            if end == self._pos:
+                raise ValueError(f"Unexpected character {char!r}")
+            self._pos = end
+        else:
+            raise ValueError("Unexpected end of JSON input")
+
+    def skip_value(self):
+        """
+        Skips the next value without decoding it.
+        """
+        self._scan_value()
+
+    def read_value(self):
+        """
+        Decodes and returns the next value.
+        """
+        self.peek()
+        self._mark = self._pos
+        try:
+            self._scan_value()
+            value, end = _DECODER.raw_decode(self._buffer, self._mark)
+        finally:
+            self._mark = None
+        self._pos = end
+        return value
+
+    def iter_object(self):
+        """
+        Walks an object, yielding each key with the scanner positioned at its value.
+
+        The caller must read, skip or walk every value before the next key is yielded.
+        """
+        self.consume("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.read_value()
+            if not isinstance(key, str):
+                raise ValueError(f"Expected an object key but found {key!r}")
+            self.consume(":")
+            yield key
+            if self.peek() == ",":
+                self._pos += 1
+                continue
+            self.consume("}")
+            return
+
+    def iter_array(self):
+        """
+        Walks an array, yielding once per element with the scanner positioned at it.
+
+        The caller must read, skip or walk every element before the next is yielded.
+        """
+        self.consume("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield
+            if self.peek() == ",":
+                self._pos += 1
+                continue
+            self.consume("]")
+            return
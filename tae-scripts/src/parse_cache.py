@@ -0,0 +1,84 @@
+import json
+import os
+import time
+
+"""
+Persistent cache of parsed Kotlin test files, keyed by git blob SHA.
+
+A blob SHA names the exact file contents, so a cached (package, class, test
+methods) entry is valid for as long as the SHA appears in the tree and an
+unchanged file needs neither a download nor a parse. The cache file is kept
+under a size limit by dropping the least recently used entries on save.
+"""
+
+
+class ParseCache:
+    """
+    Args:
+        path (str): JSON file the cache is kept in.
+        max_bytes (int): Size the serialized entries are trimmed to on save.
+    """
+
+    def __init__(self, path, max_bytes=1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.entries = {}
+        if os.path.isfile(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("entries", {})
+
+    def get(self, sha):
+        """
+        Returns the cached (package, class, test methods) for a blob, or None.
+        """
+        entry = self.entries.get(sha)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry["last_used"] = time.time()
+        return entry["package"], entry["class"], entry["tests"]
+
+    def put(self, sha, result):
+        package_name, class_name, test_methods = result
+        self.entries[sha] = {
+            "package": package_name,
+            "class": class_name,
+            "tests": list(test_methods),
+            "last_used": time.time(),
+        }
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def evict(self):
+        """
+        Drops least recently used entries until the serialized entries fit in max_bytes.
+
+        Returns:
+            int: Number of entries evicted.
+        """
+        sizes = {sha: len(json.dumps({sha: entry})) for sha, entry in self.entries.items()}
+        total = sum(sizes.values())
+        evicted = 0
+        for sha in sorted(self.entries, key=lambda sha: self.entries[sha]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= sizes[sha]
+            del self.entries[sha]
+            evicted += 1
+        return evicted
+
+    def save(self):
+        evicted = self.evict()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": self.entries}, f)
+        os.replace(tmp_path, self.path)
+        print(
+            f"Parse cache: {self.hits} hits, {self.misses} misses ({self.hit_rate():.0%} hit rate), "
+            f"{len(self.entries)} entries kept, {evicted} evicted"
+        )
@@ -0,0 +1,76 @@
+from collections import deque
+
+"""
+Aho-Corasick automaton for finding which of many names occur inside a string.
+
+Building the automaton is linear in the total length of the names, and
+scanning a string is linear in its length plus the number of matches, so
+matching N names against M keys no longer costs N x M substring searches.
+"""
+
+
+class SubstringIndex:
+    """
+    Finds every indexed name contained in a text.
+
+    Args:
+        names (iterable): Names to look for. Duplicates are indexed once.
+    """
+
+    def __init__(self, names):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [None]
+        # Nearest node on the fail chain that ends a name, so matches are
+        # collected without walking fail links that end nothing.
+        self._next_output = [0]
+        self._has_empty = False
+
+        for name in dict.fromkeys(names):
+            if name == "":
+                self._has_empty = True
+                continue
+            node = 0
+            for char in name:
+                child = self._goto[node].get(char)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto[node][char] = child
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(None)
+                    self._next_output.append(0)
+                node = child
+            self._output[node] = name
+
+        self._link()
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[child] = fail
+                self._next_output[child] = fail if self._output[fail] is not None else self._next_output[fail]
+                queue.append(child)
+
+    def find(self, text):
+        """
+        Returns the set of indexed names that occur in text.
+        """
+        goto, fail, output, next_output = self._goto, self._fail, self._output, self._next_output
+        found = {""} if self._has_empty else set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            match = node if output[node] is not None else next_output[node]
+            while match:
+                found.add(output[match])
+                match = next_output[match]
+        return found
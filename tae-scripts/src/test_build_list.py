@@ -1,12 +1,20 @@
+import argparse
 import os
+import posixpath
 import requests
 import re
 import json
+from concurrent.futures import ThreadPoolExecutor
+
+from parse_cache import ParseCache
 
 OWNER = 'mozilla-firefox'
 REPO = 'firefox'
 BRANCH = 'autoland'
-API_URL = f'https://api.github.com/repos/{OWNER}/{REPO}/contents/mobile/android/fenix/app/src/androidTest/java/org/mozilla/fenix/ui?ref={BRANCH}'
+UI_PATH = 'mobile/android/fenix/app/src/androidTest/java/org/mozilla/fenix/ui'
+GITHUB_API = os.environ.get('GITHUB_API_URL', 'https://api.github.com')
+RAW_URL = os.environ.get('GITHUB_RAW_URL', 'https://raw.githubusercontent.com')
+API_URL = f'{GITHUB_API}/repos/{OWNER}/{REPO}/contents/{UI_PATH}?ref={BRANCH}'
 HEADERS = {
     'Accept': 'application/vnd.github.v3+json',
 }
@@ -16,9 +24,9 @@ GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN', '')
 if GITHUB_TOKEN:
     HEADERS['Authorization'] = f'token {GITHUB_TOKEN}'
 
-def get_kotlin_test_files(path_url=API_URL):
+def get_kotlin_test_files(path_url=API_URL, session=requests):
     kotlin_files = []
-    response = requests.get(path_url, headers=HEADERS)
+    response = session.get(path_url, headers=HEADERS)
     response.raise_for_status()
     items = response.json()
 
@@ -26,16 +34,79 @@ def get_kotlin_test_files(path_url=API_URL):
         if item['type'] == 'file' and item['name'].endswith('.kt'):
             kotlin_files.append(item)
         elif item['type'] == 'dir':
-            kotlin_files.extend(get_kotlin_test_files(item['url']))
+            kotlin_files.extend(get_kotlin_test_files(item['url'], session))
 
     return kotlin_files
 
 
-def extract_tests_from_file(file_info):
-    file_response = requests.get(file_info['download_url'], headers=HEADERS)
+def resolve_branch_commit(session=requests):
+    """
+    Returns the SHA of the commit BRANCH currently points to.
+
+    Listing and downloading at this commit rather than at the branch keeps
+    every file's content matching the blob SHA it is cached under, even if
+    the branch moves during the run.
+    """
+    response = session.get(f'{GITHUB_API}/repos/{OWNER}/{REPO}/git/ref/heads/{BRANCH}', headers=HEADERS)
+    response.raise_for_status()
+    return response.json()['object']['sha']
+
+
+def get_kotlin_test_files_from_tree(session=requests, ref=BRANCH):
+    """
+    Lists the .kt files under UI_PATH with the Git Trees API.
+
+    The contents of the parent directory give the tree SHA of the ui
+    directory, and one recursive tree request lists everything below it.
+    Files come back in the same order as the recursive contents walk.
+    Pass a commit SHA as ref so the download URLs are pinned to the listed
+    blobs rather than to a moving branch.
+
+    Returns:
+        list: File infos with name, path, sha and download_url, or None if
+        the tree was truncated and has to be walked with the contents API.
+    """
+    parent, name = posixpath.split(UI_PATH)
+    response = session.get(f'{GITHUB_API}/repos/{OWNER}/{REPO}/contents/{parent}?ref={ref}', headers=HEADERS)
+    response.raise_for_status()
+    tree_sha = next(item['sha'] for item in response.json() if item['name'] == name and item['type'] == 'dir')
+
+    response = session.get(f'{GITHUB_API}/repos/{OWNER}/{REPO}/git/trees/{tree_sha}?recursive=1', headers=HEADERS)
+    response.raise_for_status()
+    tree = response.json()
+    if tree.get('truncated'):
+        return None
+
+    return [
+        {
+            'name': posixpath.basename(entry['path']),
+            'path': f"{UI_PATH}/{entry['path']}",
+            'sha': entry['sha'],
+            'download_url': f"{RAW_URL}/{OWNER}/{REPO}/{ref}/{UI_PATH}/{entry['path']}",
+        }
+        for entry in tree['tree']
+        if entry['type'] == 'blob' and entry['path'].endswith('.kt')
+    ]
+
+
+def create_session(pool_size):
+    """
+    Creates a session that keeps up to pool_size connections per host open.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def extract_tests_from_file(file_info, session=requests):
+    file_response = session.get(file_info['download_url'], headers=HEADERS)
     file_response.raise_for_status()
-    content = file_response.text
+    return parse_kotlin_test_file(file_response.text)
 
+
+def parse_kotlin_test_file(content):
     # Extract package name
     package_match = re.search(r'^\s*package\s+([\w\.]+)', content, re.MULTILINE)
     package_name = package_match.group(1) if package_match else 'unknown.package'
@@ -53,12 +124,35 @@ def extract_tests_from_file(file_info):
     return package_name, class_name, test_methods
 
 
-def main():
-    kotlin_files = get_kotlin_test_files(API_URL)
-    tests = []
+def main(discovery='contents', workers=1, parse_cache=None):
+    session = create_session(workers)
+    # Every listing and download reads the same commit
+    commit = resolve_branch_commit(session)
+    kotlin_files = None
+    if discovery == 'trees':
+        kotlin_files = get_kotlin_test_files_from_tree(session, commit)
+        if kotlin_files is None:
+            print('Git tree listing was truncated, walking the contents API instead')
+    if kotlin_files is None:
+        kotlin_files = get_kotlin_test_files(f'{GITHUB_API}/repos/{OWNER}/{REPO}/contents/{UI_PATH}?ref={commit}', session)
+
+    # Unchanged blobs come from the parse cache, the rest are downloaded
+    extracted = [parse_cache.get(file_info['sha']) if parse_cache else None for file_info in kotlin_files]
+    missing = [i for i, result in enumerate(extracted) if result is None]
+
+    # Downloads run concurrently, results keep the discovery order
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        downloaded = executor.map(lambda i: extract_tests_from_file(kotlin_files[i], session), missing)
+        for i, result in zip(missing, downloaded):
+            extracted[i] = result
+            if parse_cache:
+                parse_cache.put(kotlin_files[i]['sha'], result)
+
+    if parse_cache:
+        parse_cache.save()
 
-    for file_info in kotlin_files:
-        package_name, class_name, test_methods = extract_tests_from_file(file_info)
+    tests = []
+    for package_name, class_name, test_methods in extracted:
         for method in test_methods:
             test_entry = f"MediumPhone.arm-34-en_US-portrait:{package_name}.{class_name}#{method}"
             tests.append(test_entry)
@@ -72,4 +166,14 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build test_list.json from the Fenix androidTest ui sources.")
+    parser.add_argument('--discovery', choices=['contents', 'trees'], default='contents',
+                        help="List files by walking the contents API or with one recursive Git tree (default: contents)")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent file downloads (default: 8)")
+    parser.add_argument('--parse-cache', help="JSON file caching parsed files by blob SHA")
+    parser.add_argument('--parse-cache-max-kb', type=int, default=1024, help="Parse cache size limit in KB (default: 1024)")
+
+    args = parser.parse_args()
+
+    parse_cache = ParseCache(args.parse_cache, args.parse_cache_max_kb * 1024) if args.parse_cache else None
+    main(args.discovery, args.workers, parse_cache)
\ No newline at end of file
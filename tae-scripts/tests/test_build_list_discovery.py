@@ -0,0 +1,140 @@
+import hashlib
+import json
+import posixpath
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import test_build_list
+from parse_cache import ParseCache
+
+COMMIT = "c0ffee" * 6 + "c0ff"
+
+FILES = {
+    "AFooTest.kt": "package org.mozilla.fenix.ui\n\nclass AFooTest {\n    @Test\n    fun one() {}\n\n"
+                   "    @SmokeTest\n    @Test\n    fun two() {}\n}\n",
+    "robots/BarRobot.kt": "package org.mozilla.fenix.ui.robots\n\nclass BarRobot {\n    fun tap() {}\n}\n",
+    "robots/README.md": "not kotlin",
+    "settings/SettingsTest.kt": "package org.mozilla.fenix.ui.settings\n\nobject SettingsTest {\n"
+                                "    @Test\n    fun three() {}\n}\n",
+}
+
+
+def blob_sha(content):
+    data = content.encode()
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class GitHubMock:
+    """
+    Serves the contents, refs, trees and raw endpoints for the files above at COMMIT.
+    """
+
+    def __init__(self):
+        self.requests = []
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                mock.requests.append(url.path)
+                status, body = mock.route(url.path, parse_qs(url.query))
+                data = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+        self.repo = f"/repos/{test_build_list.OWNER}/{test_build_list.REPO}"
+
+    def downloads(self):
+        return [path for path in self.requests if path.startswith("/raw/")]
+
+    def route(self, path, query):
+        ui_path = test_build_list.UI_PATH
+        if path == f"{self.repo}/git/ref/heads/{test_build_list.BRANCH}":
+            return 200, {"object": {"sha": COMMIT}}
+        if path.startswith(f"{self.repo}/contents/"):
+            if query.get("ref") != [COMMIT]:
+                return 404, {"message": "not pinned"}
+            return 200, self.contents(path[len(f"{self.repo}/contents/"):])
+        if path == f"{self.repo}/git/trees/ui-tree":
+            return 200, {"truncated": False, "tree": [
+                {"path": name, "type": "blob", "sha": blob_sha(content)} for name, content in sorted(FILES.items())
+            ] + [{"path": "robots", "type": "tree", "sha": "t1"}, {"path": "settings", "type": "tree", "sha": "t2"}]}
+        prefix = f"/raw/{test_build_list.OWNER}/{test_build_list.REPO}/{COMMIT}/{ui_path}/"
+        if path.startswith(prefix) and path[len(prefix):] in FILES:
+            return 200, FILES[path[len(prefix):]]
+        return 404, {"message": "Not Found"}
+
+    def contents(self, directory):
+        ui_path = test_build_list.UI_PATH
+        if directory == posixpath.dirname(ui_path):
+            return [{"name": "ui", "type": "dir", "sha": "ui-tree"}]
+        relative = posixpath.relpath(directory, ui_path)
+        relative = "" if relative == "." else relative + "/"
+        items = {}
+        for name, content in FILES.items():
+            if not name.startswith(relative):
+                continue
+            head, _, rest = name[len(relative):].partition("/")
+            path = f"{directory}/{head}"
+            if rest:
+                items[head] = {"name": head, "type": "dir",
+                               "url": f"{self.base}{self.repo}/contents/{path}?ref={COMMIT}"}
+            else:
+                items[head] = {"name": head, "type": "file", "path": path, "sha": blob_sha(content),
+                               "download_url": f"{self.base}/raw/{test_build_list.OWNER}/"
+                                               f"{test_build_list.REPO}/{COMMIT}/{path}"}
+        return [items[name] for name in sorted(items)]
+
+
+@pytest.fixture
+def github(monkeypatch, tmp_path):
+    mock = GitHubMock()
+    thread = threading.Thread(target=mock.server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(test_build_list, "GITHUB_API", mock.base)
+    monkeypatch.setattr(test_build_list, "RAW_URL", f"{mock.base}/raw")
+    monkeypatch.chdir(tmp_path)
+    yield mock
+    mock.server.shutdown()
+    mock.server.server_close()
+
+
+def build(discovery, parse_cache=None):
+    test_build_list.main(discovery, workers=4, parse_cache=parse_cache)
+    with open("test_list.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_trees_and_contents_write_the_same_list(github):
+    contents = build("contents")
+    trees = build("trees")
+
+    assert trees == contents
+    assert contents["tests"] == [
+        "MediumPhone.arm-34-en_US-portrait:org.mozilla.fenix.ui.AFooTest#one",
+        "MediumPhone.arm-34-en_US-portrait:org.mozilla.fenix.ui.AFooTest#two",
+        "MediumPhone.arm-34-en_US-portrait:org.mozilla.fenix.ui.settings.SettingsTest#three",
+    ]
+
+
+def test_second_run_is_served_from_the_parse_cache(github, tmp_path):
+    cache_path = str(tmp_path / "parse_cache.json")
+    first = build("trees", ParseCache(cache_path))
+    assert len(github.downloads()) == 3
+
+    cache = ParseCache(cache_path)
+    second = build("trees", cache)
+
+    assert second == first
+    assert len(github.downloads()) == 3
+    assert (cache.hits, cache.misses) == (3, 0)
@@ -0,0 +1,95 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_cache import HttpCache
+
+
+class HistoryServer:
+    """
+    Serves one body with a content ETag, answering 304 to a matching If-None-Match.
+    """
+
+    def __init__(self):
+        self.body = b'{"runs": [1]}'
+        self.log = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                etag = f'"{hashlib.sha256(server.body).hexdigest()[:12]}"'
+                conditional = self.headers.get("If-None-Match")
+                if conditional == etag:
+                    server.log.append(304)
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                server.log.append(200)
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(server.body)))
+                self.end_headers()
+                self.wfile.write(server.body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/history.json"
+
+
+@pytest.fixture
+def server():
+    server = HistoryServer()
+    thread = threading.Thread(target=server.httpd.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_not_modified_reuses_the_cached_body_and_results(tmp_path, server):
+    cache = HttpCache(str(tmp_path))
+
+    path, reused = cache.fetch(server.url)
+    assert (read(path), reused) == (server.body, False)
+    cache.save_result(server.url, "summary", {"runs": 1})
+
+    path, reused = cache.fetch(server.url)
+    assert (read(path), reused) == (server.body, True)
+    assert cache.load_result(server.url, "summary") == {"runs": 1}
+    assert server.log == [200, 304]
+
+
+def test_changed_body_is_downloaded_and_drops_results(tmp_path, server):
+    cache = HttpCache(str(tmp_path))
+    cache.fetch(server.url)
+    cache.save_result(server.url, "summary", {"runs": 1})
+
+    server.body = b'{"runs": [1, 2]}'
+    path, reused = cache.fetch(server.url)
+
+    assert (read(path), reused) == (server.body, False)
+    assert cache.load_result(server.url, "summary") is None
+    assert server.log == [200, 200]
+
+
+def test_offline_reads_only_the_cache(tmp_path, server):
+    cache = HttpCache(str(tmp_path))
+    with pytest.raises(FileNotFoundError):
+        cache.fetch(server.url, offline=True)
+
+    cache.fetch(server.url)
+    server.httpd.shutdown()
+    path, reused = cache.fetch(server.url, offline=True)
+
+    assert (read(path), reused) == (server.body, True)
+    assert server.log == [200]